@@ -19,6 +19,9 @@ _classes = [
     operators.CHAOS_OT_clear_scene,
     operators.CHAOS_OT_save_last,
     operators.CHAOS_OT_reset_defaults,
+    operators.CHAOS_OT_clear_trajectory_cache,
+    operators.CHAOS_OT_benchmark_vertex_write,
+    operators.CHAOS_OT_bake_optimized,
     ui.CHAOS_PT_panel,
 ]
 
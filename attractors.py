@@ -1,211 +1,627 @@
 """
-Chaotic attractor equation definitions
+Chaotic attractor equation definitions and the attractor registry
 """
-import math
+from collections import namedtuple
 import numpy as np
+from . import backends, checkpoints, expressions, integrators
 
 
-def step_lorenz(x, y, z, dt, sigma, rho, beta):
+# Vectorized derivative functions. Each works on scalars and NumPy arrays alike and is
+# plain enough arithmetic for the JIT backend to compile unchanged.
+def deriv_lorenz(x, y, z, sigma, rho, beta):
     dx = sigma * (y - x)
     dy = x * (rho - z) - y
     dz = x * y - beta * z
-    return (x + dx*dt, y + dy*dt, z + dz*dt)
+    return dx, dy, dz
 
-def step_rossler(x, y, z, dt, a, b, c):
+def deriv_rossler(x, y, z, a, b, c):
     dx = -y - z
-    dy = x + a*y
-    dz = b + z*(x - c)
-    return (x + dx*dt, y + dy*dt, z + dz*dt)
-
-def step_thomas(x, y, z, dt, bval):
-    dx = math.sin(y) - bval*x
-    dy = math.sin(z) - bval*y
-    dz = math.sin(x) - bval*z
-    return (x + dx*dt, y + dy*dt, z + dz*dt)
-
-def step_langford(x, y, z, dt, a, b, c, d, ee, f):
-    dx = (z - b)*x - d*y
-    dy = d*x + (z - b)*y
-    dz = c + a*z - (z**3)/3 - (x**2 + y**2)*(1 + ee*z) + f*z*(x**3)
-    return (x + dx*dt, y + dy*dt, z + dz*dt)
-
-def step_dadras(x, y, z, dt, a, b, c, d, e):
-    dx = y - a*x + b*y*z
-    dy = c*y - x*z + z
-    dz = d*x*y - e*z
-    return (x + dx*dt, y + dy*dt, z + dz*dt)
-
-def step_custom(x, y, z, dt, eqn_x, eqn_y, eqn_z, a, b, c, d, e, f):
-    local_vars = {'x': x, 'y': y, 'z': z,
-                  'a': a, 'b': b, 'c': c, 'd': d, 'e': e, 'f': f,
-                  'math': math}
-    dx = eval(eqn_x, {"__builtins__": {}}, local_vars)
-    dy = eval(eqn_y, {"__builtins__": {}}, local_vars)
-    dz = eval(eqn_z, {"__builtins__": {}}, local_vars)
-    return (x + dx*dt, y + dy*dt, z + dz*dt)
-
-def step_fourwing(x, y, z, dt, a, b, c):
-    dx = a*x + y*z
-    dy = b*x + c*y - x*z
-    dz = -z - x*y
-    return (x + dx*dt, y + dy*dt, z + dz*dt)
-
-def step_sprott(x, y, z, dt, a, b):
-    dx = y + a*x*y + x*z
-    dy = 1 - b*(x**2) + y*z
+    dy = x + a * y
+    dz = b + z * (x - c)
+    return dx, dy, dz
+
+def deriv_thomas(x, y, z, bval):
+    dx = np.sin(y) - bval * x
+    dy = np.sin(z) - bval * y
+    dz = np.sin(x) - bval * z
+    return dx, dy, dz
+
+def deriv_langford(x, y, z, a, b, c, d, ee, f):
+    dx = (z - b) * x - d * y
+    dy = d * x + (z - b) * y
+    dz = c + a * z - (z**3)/3 - (x**2 + y**2)*(1 + ee*z) + f*z*(x**3)
+    return dx, dy, dz
+
+def deriv_dadras(x, y, z, a, b, c, d, e):
+    dx = y - a * x + b * y * z
+    dy = c * y - x * z + z
+    dz = d * x * y - e * z
+    return dx, dy, dz
+
+def deriv_fourwing(x, y, z, a, b, c):
+    dx = a * x + y * z
+    dy = b * x + c * y - x * z
+    dz = -z - x * y
+    return dx, dy, dz
+
+def deriv_sprott(x, y, z, a, b):
+    dx = y + a * x * y + x * z
+    dy = 1 - b * (x**2) + y * z
     dz = x - (x**2) - (y**2)
-    return (x + dx*dt, y + dy*dt, z + dz*dt)
+    return dx, dy, dz
 
-def step_halvorsen(x, y, z, dt, a):
-    dx = -a*x - 4*y - 4*z - (y**2)
-    dy = -a*y - 4*z - 4*x - (z**2)
-    dz = -a*z - 4*x - 4*y - (x**2)
-    return (x + dx*dt, y + dy*dt, z + dz*dt)
+def deriv_halvorsen(x, y, z, a):
+    dx = -a * x - 4 * y - 4 * z - (y**2)
+    dy = -a * y - 4 * z - 4 * x - (z**2)
+    dz = -a * z - 4 * x - 4 * y - (x**2)
+    return dx, dy, dz
 
-def step_lorenz83(x, y, z, dt, a, b, ff, g):
-    dx = -a*x - (y**2) - (z**2) + a*ff
-    dy = -y + x*y - b*x*z + g
-    dz = -z + b*x*y + x*z
-    return (x + dx*dt, y + dy*dt, z + dz*dt)
+def deriv_lorenz83(x, y, z, a, b, ff, g):
+    dx = -a * x - (y**2) - (z**2) + a * ff
+    dy = -y + x * y - b * x * z + g
+    dz = -z + b * x * y + x * z
+    return dx, dy, dz
 
-def step_arneodo(x, y, z, dt, a, b, c):
+def deriv_arneodo(x, y, z, a, b, c):
     dx = y
     dy = z
-    dz = a * x - b * y - z - c * x**3
-    return (x + dx*dt, y + dy*dt, z + dz*dt)
+    dz = a * x - b * y - z - c * (x**3)
+    return dx, dy, dz
 
-def step_rucklidge(x, y, z, dt, A, B):
+def deriv_rucklidge(x, y, z, A, B):
     dx = -B * x + A * y - y * z
     dy = x
     dz = y**2 - z
-    return (x + dx*dt, y + dy*dt, z + dz*dt)
-
-
-# Optimized simulation step function for on-demand computation
-def simulate_step_on_demand(attractor_type, x, y, z, dt,
-                           sigma, rho, beta,
-                           a_val, b_val, c_val,
-                           thomas_b,
-                           lang_a, lang_b, lang_c, lang_d, lang_e, lang_f,
-                           dad_a, dad_b, dad_c, dad_d, dad_e,
-                           fw_a, fw_b, fw_c,
-                           sp_a, sp_b,
-                           halv_a,
-                           l83_a, l83_b, l83_f, l83_g,
-                           eqn_x, eqn_y, eqn_z,
-                           d_val=0.0, e_val=0.0, f_val=0.0):
-    if attractor_type == 'LORENZ':
-        dx = sigma * (y - x)
-        dy = x * (rho - z) - y
-        dz = x * y - beta * z
-    elif attractor_type == 'ROSSLER':
-        dx = -y - z
-        dy = x + a_val * y
-        dz = b_val + z * (x - c_val)
-    elif attractor_type == 'THOMAS':
-        dx = np.sin(y) - thomas_b * x
-        dy = np.sin(z) - thomas_b * y
-        dz = np.sin(x) - thomas_b * z
-    elif attractor_type == 'LANGFORD':
-        dx = (z - lang_b) * x - lang_d * y
-        dy = lang_d * x + (z - lang_b) * y
-        dz = lang_c + lang_a * z - (z**3)/3 - (x**2 + y**2)*(1 + lang_e*z) + lang_f*z*(x**3)
-    elif attractor_type == 'DADRAS':
-        dx = y - dad_a * x + dad_b * y * z
-        dy = dad_c * y - x * z + z
-        dz = dad_d * x * y - dad_e * z
-    elif attractor_type == 'FOURWING':
-        dx = fw_a * x + y * z
-        dy = fw_b * x + fw_c * y - x * z
-        dz = -z - x * y
-    elif attractor_type == 'SPROTT':
-        dx = y + sp_a * x * y + x * z
-        dy = 1 - sp_b * (x**2) + y * z
-        dz = x - (x**2) - (y**2)
-    elif attractor_type == 'HALVORSEN':
-        dx = -halv_a * x - 4 * y - 4 * z - (y**2)
-        dy = -halv_a * y - 4 * z - 4 * x - (z**2)
-        dz = -halv_a * z - 4 * x - 4 * y - (x**2)
-    elif attractor_type == 'LORENZ83':
-        dx = -l83_a * x - (y**2) - (z**2) + l83_a * l83_f
-        dy = -y + x * y - l83_b * x * z + l83_g
-        dz = -z + l83_b * x * y + x * z
-    elif attractor_type == 'ARNEODO':
-        dx = y
-        dy = z
-        dz = a_val * x - b_val * y - z - c_val * (x**3)
-    elif attractor_type == 'RUCKLIDGE':
-        dx = -b_val * x + a_val * y - y * z
-        dy = x
-        dz = y**2 - z
-    elif attractor_type == 'CUSTOM':
-        # Properly use the custom equations for optimized mode
-        import math
-        local_vars = {'x': x, 'y': y, 'z': z,
-                       'a': a_val, 'b': b_val, 'c': c_val, 
-                       'd': d_val, 'e': e_val, 'f': f_val,
-                       'math': math, 'np': np}
-        try:
-            dx = eval(eqn_x, {"__builtins__": {}}, local_vars)
-            dy = eval(eqn_y, {"__builtins__": {}}, local_vars)
-            dz = eval(eqn_z, {"__builtins__": {}}, local_vars)
-        except Exception:
-            # If there's an error in the custom equation, fall back to Lorenz
-            dx = sigma * (y - x)
-            dy = x * (rho - z) - y
-            dz = x * y - beta * z
-    else:
-        dx = sigma * (y - x)
-        dy = x * (rho - z) - y
-        dz = x * y - beta * z
-
-    x_new = x + dx * dt
-    y_new = y + dy * dt
-    z_new = z + dz * dt
-    return x_new, y_new, z_new
-
-
-def initialize_on_demand_simulation(attractor_type, num_particles, dt,
-                           sigma, rho, beta,
-                           a_val, b_val, c_val,
-                           thomas_b,
-                           lang_a, lang_b, lang_c, lang_d, lang_e, lang_f,
-                           dad_a, dad_b, dad_c, dad_d, dad_e,
-                           fw_a, fw_b, fw_c,
-                           sp_a, sp_b,
-                           halv_a,
-                           l83_a, l83_b, l83_f, l83_g,
-                           eqn_x, eqn_y, eqn_z,
-                           d_val, e_val, f_val,
-                           offset_scale, origin, scale, rot_x, rot_y, rot_z,
-                           speed_factor):
-    """Initialize on-demand simulation state"""
+    return dx, dy, dz
+
+# In-place variants of the derivatives for the allocation-free on-demand path. Each takes
+# a (3, N) state, the parameter record, a (3, N) output buffer for (dx, dy, dz) and a
+# (2, N) scratch buffer, and writes every intermediate with out= instead of allocating.
+def deriv_lorenz_inplace(state, params, out, tmp):
+    sigma, rho, beta = params
+    x, y, z = state
+    dx, dy, dz = out
+    t0 = tmp[0]
+    np.subtract(y, x, out=dx)
+    dx *= sigma
+    np.subtract(rho, z, out=dy)
+    dy *= x
+    dy -= y
+    np.multiply(x, y, out=dz)
+    np.multiply(z, beta, out=t0)
+    dz -= t0
+
+def deriv_rossler_inplace(state, params, out, tmp):
+    a, b, c = params
+    x, y, z = state
+    dx, dy, dz = out
+    np.add(y, z, out=dx)
+    np.negative(dx, out=dx)
+    np.multiply(y, a, out=dy)
+    dy += x
+    np.subtract(x, c, out=dz)
+    dz *= z
+    dz += b
+
+def deriv_thomas_inplace(state, params, out, tmp):
+    bval, = params
+    x, y, z = state
+    t0 = tmp[0]
+    for d, s, v in zip(out, (y, z, x), state):
+        np.sin(s, out=d)
+        np.multiply(v, bval, out=t0)
+        d -= t0
+
+def deriv_langford_inplace(state, params, out, tmp):
+    a, b, c, d, ee, f = params
+    x, y, z = state
+    dx, dy, dz = out
+    t0, t1 = tmp
+    np.subtract(z, b, out=t0)
+    np.multiply(t0, x, out=dx)
+    np.multiply(y, d, out=t1)
+    dx -= t1
+    np.multiply(t0, y, out=dy)
+    np.multiply(x, d, out=t1)
+    dy += t1
+    np.multiply(z, a, out=dz)
+    dz += c
+    np.multiply(z, z, out=t0)
+    t0 *= z
+    t0 /= 3
+    dz -= t0
+    np.multiply(x, x, out=t0)
+    np.multiply(y, y, out=t1)
+    t0 += t1
+    np.multiply(z, ee, out=t1)
+    t1 += 1
+    t0 *= t1
+    dz -= t0
+    np.multiply(x, x, out=t0)
+    t0 *= x
+    t0 *= z
+    t0 *= f
+    dz += t0
+
+def deriv_dadras_inplace(state, params, out, tmp):
+    a, b, c, d, e = params
+    x, y, z = state
+    dx, dy, dz = out
+    t0 = tmp[0]
+    np.multiply(y, z, out=dx)
+    dx *= b
+    dx += y
+    np.multiply(x, a, out=t0)
+    dx -= t0
+    np.multiply(y, c, out=dy)
+    np.multiply(x, z, out=t0)
+    dy -= t0
+    dy += z
+    np.multiply(x, y, out=dz)
+    dz *= d
+    np.multiply(z, e, out=t0)
+    dz -= t0
+
+def deriv_fourwing_inplace(state, params, out, tmp):
+    a, b, c = params
+    x, y, z = state
+    dx, dy, dz = out
+    t0 = tmp[0]
+    np.multiply(y, z, out=dx)
+    np.multiply(x, a, out=t0)
+    dx += t0
+    np.multiply(x, b, out=dy)
+    np.multiply(y, c, out=t0)
+    dy += t0
+    np.multiply(x, z, out=t0)
+    dy -= t0
+    np.multiply(x, y, out=dz)
+    dz += z
+    np.negative(dz, out=dz)
+
+def deriv_sprott_inplace(state, params, out, tmp):
+    a, b = params
+    x, y, z = state
+    dx, dy, dz = out
+    t0 = tmp[0]
+    np.multiply(x, y, out=dx)
+    dx *= a
+    dx += y
+    np.multiply(x, z, out=t0)
+    dx += t0
+    np.multiply(y, z, out=dy)
+    dy += 1
+    np.multiply(x, x, out=t0)
+    t0 *= b
+    dy -= t0
+    np.multiply(x, x, out=t0)
+    np.subtract(x, t0, out=dz)
+    np.multiply(y, y, out=t0)
+    dz -= t0
+
+def deriv_halvorsen_inplace(state, params, out, tmp):
+    a, = params
+    x, y, z = state
+    t0, t1 = tmp
+    # d(v) = -a*v - 4*u - 4*w - u**2 for the cyclic triples (x, y, z), (y, z, x), (z, x, y)
+    for d, v, u, w in zip(out, (x, y, z), (y, z, x), (z, x, y)):
+        np.add(u, w, out=t1)
+        t1 *= 4
+        np.multiply(v, -a, out=d)
+        d -= t1
+        np.multiply(u, u, out=t0)
+        d -= t0
+
+def deriv_lorenz83_inplace(state, params, out, tmp):
+    a, b, ff, g = params
+    x, y, z = state
+    dx, dy, dz = out
+    t0 = tmp[0]
+    np.multiply(x, -a, out=dx)
+    np.multiply(y, y, out=t0)
+    dx -= t0
+    np.multiply(z, z, out=t0)
+    dx -= t0
+    dx += a * ff
+    np.multiply(x, y, out=dy)
+    dy -= y
+    np.multiply(x, z, out=t0)
+    t0 *= b
+    dy -= t0
+    dy += g
+    np.multiply(x, y, out=dz)
+    dz *= b
+    np.multiply(x, z, out=t0)
+    dz += t0
+    dz -= z
+
+def deriv_arneodo_inplace(state, params, out, tmp):
+    a, b, c = params
+    x, y, z = state
+    dx, dy, dz = out
+    t0 = tmp[0]
+    np.copyto(dx, y)
+    np.copyto(dy, z)
+    np.multiply(x, a, out=dz)
+    np.multiply(y, b, out=t0)
+    dz -= t0
+    dz -= z
+    np.multiply(x, x, out=t0)
+    t0 *= x
+    t0 *= c
+    dz -= t0
+
+def deriv_rucklidge_inplace(state, params, out, tmp):
+    A, B = params
+    x, y, z = state
+    dx, dy, dz = out
+    t0 = tmp[0]
+    np.multiply(y, A, out=dx)
+    np.multiply(x, B, out=t0)
+    dx -= t0
+    np.multiply(y, z, out=t0)
+    dx -= t0
+    np.copyto(dy, x)
+    np.multiply(y, y, out=dz)
+    dz -= z
+
+
+def inplace_from_vectorized(func):
+    """Wrap a vectorized derivative (e.g. compiled custom equations) in the in-place signature
+
+    The derivative itself still allocates, but its results land in the shared buffers.
+    """
+    def derivative_inplace(state, params, out, tmp):
+        out[0], out[1], out[2] = func(state[0], state[1], state[2], *params)
+    return derivative_inplace
+
+
+
+# Registry entry describing one attractor. params lists (scene property, label) pairs in
+# the order the derivative expects them; animated params also have *_start/*_end
+# properties for PARAMETER_ANIMATION, named after anim_props (by default the params'
+# own properties, which attractors sharing chaos_a.. must not reuse). defaults are extra
+# property values applied when the attractor is selected. derivative_inplace is the
+# optional allocation-free variant.
+AttractorSpec = namedtuple('AttractorSpec', 'label description derivative params default_dt defaults animated '
+                                            'derivative_inplace anim_props')
+
+ATTRACTORS = {}
+
+
+def register_attractor(key, label, derivative, params, default_dt=None, defaults=None,
+                       description="", animated=True, derivative_inplace=None, anim_props=None):
+    """Add an attractor to the registry; every mode, panel and operator picks it up"""
+    params = tuple(params)
+    anim_props = tuple(anim_props) if anim_props else tuple(prop for prop, _ in params)
+    ATTRACTORS[key] = AttractorSpec(label, description, derivative, params,
+                                    default_dt, defaults or {}, animated, derivative_inplace, anim_props)
+
+
+# Registration order is the order of the Attractor enum, which .blend files rely on.
+register_attractor('LORENZ', "Lorenz", deriv_lorenz,
+                   (('chaos_sigma', "σ"), ('chaos_rho', "ρ"), ('chaos_beta', "β")), 0.01,
+                   derivative_inplace=deriv_lorenz_inplace)
+register_attractor('ROSSLER', "Rössler", deriv_rossler,
+                   (('chaos_a', "a"), ('chaos_b', "b"), ('chaos_c', "c")), 0.07,
+                   derivative_inplace=deriv_rossler_inplace)
+register_attractor('THOMAS', "Thomas", deriv_thomas,
+                   (('chaos_thomas_b', "b"),), 0.21,
+                   derivative_inplace=deriv_thomas_inplace)
+register_attractor('LANGFORD', "Langford (Aizawa)", deriv_langford,
+                   (('chaos_lang_a', "a"), ('chaos_lang_b', "b"), ('chaos_lang_c', "c"),
+                    ('chaos_lang_d', "d"), ('chaos_lang_e', "e"), ('chaos_lang_f', "f")), 0.01,
+                   derivative_inplace=deriv_langford_inplace)
+register_attractor('DADRAS', "Dadras", deriv_dadras,
+                   (('chaos_dad_a', "a"), ('chaos_dad_b', "b"), ('chaos_dad_c', "c"),
+                    ('chaos_dad_d', "d"), ('chaos_dad_e', "e")), 0.01,
+                   derivative_inplace=deriv_dadras_inplace)
+register_attractor('FOURWING', "Four-Wing", deriv_fourwing,
+                   (('chaos_fw_a', "a"), ('chaos_fw_b', "b"), ('chaos_fw_c', "c")), 0.088,
+                   derivative_inplace=deriv_fourwing_inplace)
+register_attractor('SPROTT', "Sprott", deriv_sprott,
+                   (('chaos_sp_a', "a"), ('chaos_sp_b', "b")), 0.02,
+                   derivative_inplace=deriv_sprott_inplace)
+register_attractor('HALVORSEN', "Halvorsen", deriv_halvorsen,
+                   (('chaos_halv_a', "a"),), 0.01,
+                   derivative_inplace=deriv_halvorsen_inplace)
+register_attractor('LORENZ83', "Lorenz83", deriv_lorenz83,
+                   (('chaos_l83_a', "a"), ('chaos_l83_b', "b"), ('chaos_l83_f', "f"), ('chaos_l83_g', "g")), 0.01,
+                   derivative_inplace=deriv_lorenz83_inplace)
+# The CUSTOM derivative is compiled from the equation strings at run time
+register_attractor('CUSTOM', "Custom", None,
+                   (('chaos_a', "a"), ('chaos_b', "b"), ('chaos_c', "c"),
+                    ('chaos_d', "d"), ('chaos_e', "e"), ('chaos_f', "f")),
+                   anim_props=('chaos_cust_a', 'chaos_cust_b', 'chaos_cust_c',
+                               'chaos_cust_d', 'chaos_cust_e', 'chaos_cust_f'))
+register_attractor('ARNEODO', "Arneodo", deriv_arneodo,
+                   (('chaos_a', "a"), ('chaos_b', "b"), ('chaos_c', "c")), 0.025,
+                   defaults={'chaos_a': 5.5, 'chaos_b': 3.5, 'chaos_c': 0.01},
+                   description="Arneodo Attractor",
+                   anim_props=('chaos_arn_a', 'chaos_arn_b', 'chaos_arn_c'),
+                   derivative_inplace=deriv_arneodo_inplace)
+register_attractor('RUCKLIDGE', "Rucklidge", deriv_rucklidge,
+                   (('chaos_a', "a"), ('chaos_b', "b")), 0.07,
+                   defaults={'chaos_a': 6.7, 'chaos_b': 2.0},
+                   description="Rucklidge Attractor",
+                   anim_props=('chaos_ruck_a', 'chaos_ruck_b'),
+                   derivative_inplace=deriv_rucklidge_inplace)
+
+
+def get_spec(attractor_type):
+    """Return the registry entry for an attractor, falling back to Lorenz"""
+    return ATTRACTORS.get(attractor_type, ATTRACTORS['LORENZ'])
+
+
+def enum_items():
+    """EnumProperty items for every registered attractor"""
+    return [(key, spec.label, spec.description) for key, spec in ATTRACTORS.items()]
+
+
+def apply_attractor_defaults(scn):
+    """Apply the default dt and parameter overrides of the selected attractor"""
+    spec = get_spec(scn.chaos_attractor_type)
+    if spec.default_dt is not None:
+        scn.chaos_dt = spec.default_dt
+    for prop, value in spec.defaults.items():
+        setattr(scn, prop, value)
+
+
+def params_from_scene(scn, attractor_type):
+    """Read the compact parameter record of an attractor from the scene"""
+    return tuple(float(getattr(scn, prop)) for prop, _ in get_spec(attractor_type).params)
+
+
+def interpolated_params_from_scene(scn, attractor_type, t):
+    """Parameter record interpolated between the *_start and *_end values at t in [0, 1]"""
+    spec = get_spec(attractor_type)
+    if not spec.animated:
+        return params_from_scene(scn, attractor_type)
+    return tuple(getattr(scn, prop + "_start") + t * (getattr(scn, prop + "_end") - getattr(scn, prop + "_start"))
+                 for prop in spec.anim_props)
+
+
+def interpolated_param_table(scn, attractor_type, frames):
+    """(frames, num_params) array of parameter records swept linearly from start to end"""
+    spec = get_spec(attractor_type)
+    if not spec.animated:
+        return np.tile(params_from_scene(scn, attractor_type), (frames, 1))
+    start = np.array([getattr(scn, prop + "_start") for prop in spec.anim_props], dtype=np.float64)
+    end = np.array([getattr(scn, prop + "_end") for prop in spec.anim_props], dtype=np.float64)
+    t = np.linspace(0.0, 1.0, frames) if frames > 1 else np.zeros(frames)
+    return start + t[:, None] * (end - start)
+
+
+def resolve_inplace_kernel(attractor_type, eqns=None):
+    """Resolve an attractor to its in-place derivative (see deriv_lorenz_inplace)"""
+    spec = get_spec(attractor_type)
+    if spec.derivative_inplace is not None:
+        return spec.derivative_inplace
+    func, _ = resolve_kernel(attractor_type, (), eqns)
+    return inplace_from_vectorized(func)
+
+
+def equations_from_scene(scn):
+    """Custom equation strings from the scene"""
+    return (scn.chaos_eqn_x, scn.chaos_eqn_y, scn.chaos_eqn_z)
+
+
+def resolve_kernel(attractor_type, params, eqns=None):
+    """Resolve an attractor to its derivative function and parameter record
+
+    The result is used as func(x, y, z, *params), so the attractor is looked up once
+    per run instead of on every step. CUSTOM equations are compiled (once per text)
+    and raise ValueError when invalid.
+    """
+    spec = get_spec(attractor_type)
+    func = spec.derivative
+    if func is None:
+        func = expressions.compile_custom_equations(*eqns)
+    return func, tuple(params)
+
+
+def euler_xyz_matrix(rx, ry, rz):
+    """3x3 rotation matrix of an XYZ Euler rotation (same as mathutils.Euler.to_matrix)"""
+    cx, sx = np.cos(rx), np.sin(rx)
+    cy, sy = np.cos(ry), np.sin(ry)
+    cz, sz = np.cos(rz), np.sin(rz)
+    rot_x = np.array(((1, 0, 0), (0, cx, -sx), (0, sx, cx)))
+    rot_y = np.array(((cy, 0, sy), (0, 1, 0), (-sy, 0, cy)))
+    rot_z = np.array(((cz, -sz, 0), (sz, cz, 0), (0, 0, 1)))
+    return rot_z @ rot_y @ rot_x
+
+
+def initialize_on_demand_simulation(attractor_type, params, num_particles, dt,
+                                    offset_scale, origin, scale, rot_x, rot_y, rot_z,
+                                    speed_factor, eqns=None,
+                                    integrator='EULER', tolerance=1e-6, backend='AUTO',
+                                    checkpoint_interval=100, checkpoint_budget=256 * 2**20,
+                                    release_offset=0):
+    """Initialize on-demand simulation state
+
+    The particle state is a single (3, N) float32 buffer that the frame handler advances
+    in place, alongside a preallocated stage workspace and an (N, 3) positions buffer,
+    so stepping and transforming a frame allocate nothing per particle. Checkpoints of
+    the state let the handler seek backwards without re-integrating from iteration 0.
+    With a release offset, particle p starts moving p * release_offset frames late.
+    """
     # Set up initial conditions with random offset
-    x0 = np.random.uniform(0.1 - offset_scale, 0.1 + offset_scale, size=num_particles).astype(np.float32)
-    y0 = np.random.uniform(0.11 - offset_scale, 0.11 + offset_scale, size=num_particles).astype(np.float32)
-    z0 = np.random.uniform(0.12 - offset_scale, 0.12 + offset_scale, size=num_particles).astype(np.float32)
-    
+    initial = np.empty((3, num_particles), dtype=np.float32)
+    initial[0] = np.random.uniform(0.1 - offset_scale, 0.1 + offset_scale, size=num_particles)
+    initial[1] = np.random.uniform(0.11 - offset_scale, 0.11 + offset_scale, size=num_particles)
+    initial[2] = np.random.uniform(0.12 - offset_scale, 0.12 + offset_scale, size=num_particles)
+    func, params = resolve_kernel(attractor_type, params, eqns)
+    release = None
+    if release_offset > 0:
+        # Iteration at which each particle starts moving; increasing with the index
+        release = (np.arange(num_particles) * (release_offset * speed_factor)).astype(np.int64)
+
     # Pack simulation and transformation parameters in a dictionary
     state_dict = {
-         "initial_state": (x0, y0, z0),
-         "current_state": (x0.copy(), y0.copy(), z0.copy()),
+         "initial_state": initial,
+         "state": initial.copy(),
          "last_frame": 0,
+         # Iteration the recorded step velocities lead to, and how many of them are valid
+         "velocity_iteration": None,
+         "velocity_count": 0,
          "dt": dt,
          "attractor_type": attractor_type,
-         "sigma": sigma, "rho": rho, "beta": beta,
-         "a_val": a_val, "b_val": b_val, "c_val": c_val,
-         "d_val": d_val, "e_val": e_val, "f_val": f_val,
-         "thomas_b": thomas_b,
-         "lang_a": lang_a, "lang_b": lang_b, "lang_c": lang_c, "lang_d": lang_d, "lang_e": lang_e, "lang_f": lang_f,
-         "dad_a": dad_a, "dad_b": dad_b, "dad_c": dad_c, "dad_d": dad_d, "dad_e": dad_e,
-         "fw_a": fw_a, "fw_b": fw_b, "fw_c": fw_c,
-         "sp_a": sp_a, "sp_b": sp_b,
-         "halv_a": halv_a,
-         "l83_a": l83_a, "l83_b": l83_b, "l83_f": l83_f, "l83_g": l83_g,
-         "eqn_x": eqn_x, "eqn_y": eqn_y, "eqn_z": eqn_z,
+         "params": params,
+         "eqns": eqns,
+         "kernel": func,
+         "kernel_inplace": resolve_inplace_kernel(attractor_type, eqns),
+         "workspace": integrators.allocate_workspace(num_particles, integrator, velocities=True),
+         "checkpoints": checkpoints.StateCheckpoints(initial, checkpoint_interval, checkpoint_budget),
+         "positions": np.empty((num_particles, 3), dtype=np.float32),
          "origin": origin,
          "scale": scale,
          "rot": (rot_x, rot_y, rot_z),
+         "rot_t": euler_xyz_matrix(rot_x, rot_y, rot_z).T.astype(np.float32),
          "speed_factor": speed_factor,
+         "integrator": integrator,
+         "tolerance": tolerance,
+         "backend": backend,
+         "release": release,
+         "release_offset": release_offset,
     }
-    return state_dict 
\ No newline at end of file
+    return state_dict
+
+
+def step_on_demand_state(data, state, start, steps, workspace=None):
+    """Advance an on-demand (3, N) state in place from iteration start by steps
+
+    With staggered release only the particles released by then move. They are ordered
+    by release, so the active set is a prefix of the state and every stretch between
+    two releases advances one slice, keeping the state a function of the iteration.
+    Stepping the simulation's own state records the velocities of the last two steps
+    (RK45 records none), which on_demand_velocity and on_demand_fields read back.
+    """
+    record = workspace is None and steps > 0 and data["integrator"] != 'RK45'
+    if workspace is None:
+        workspace = data["workspace"]
+    if record:
+        # Recorded velocities only carry over when this call continues the last one
+        known = data["velocity_count"] if data["velocity_iteration"] == start else 0
+        data["velocity_count"] = min(2, known + steps)
+        data["velocity_iteration"] = start + steps
+    release = data["release"]
+    tolerance = data["tolerance"]
+    end = start + steps
+    while start < end:
+        if release is None:
+            active, stop = state.shape[1], end
+            active_state, active_workspace = state, workspace
+        else:
+            active = int(np.searchsorted(release, start, side='right'))
+            stop = end if active == len(release) else min(end, int(release[active]))
+            active_state = state[:, :active]
+            active_workspace = {name: buffer[:, :active] for name, buffer in workspace.items()}
+        if active:
+            backends.advance_inplace(data["kernel"], data["kernel_inplace"], data["params"],
+                                     active_state, data["dt"], stop - start, data["integrator"],
+                                     backend=data["backend"], rtol=tolerance, atol=tolerance,
+                                     workspace=active_workspace)
+        start = stop
+    return state
+
+
+def _step_velocities(data, state):
+    """The (3, N) derivatives the last two integration steps to state started from
+
+    Either is None when the stepper recorded nothing valid for this state: before the
+    first step, after seeking straight onto a checkpoint, or with RK45.
+    """
+    workspace = data["workspace"]
+    known = 0
+    if state is data["state"] and data["velocity_iteration"] == data["last_frame"]:
+        known = data["velocity_count"]
+    return (workspace["v_last"] if known >= 1 else None,
+            workspace["v_prev"] if known >= 2 else None)
+
+
+def on_demand_velocity(data, state, out=None):
+    """Rotate the velocity of a (3, N) state into an (N, 3) velocity array
+
+    The velocity is the derivative the integration step to this state started from, as
+    recorded by the stepper, so no derivative is evaluated. Only without a recorded one
+    is the derivative evaluated into the stage workspace. Allocates nothing apart from
+    the output (unless an (N, 3) float32 out buffer is given).
+    """
+    workspace = data["workspace"]
+    velocity, _ = _step_velocities(data, state)
+    if velocity is None:
+        velocity = workspace["k1"]
+        data["kernel_inplace"](state, data["params"], velocity, workspace["tmp"])
+    if out is None:
+        out = np.empty((state.shape[1], 3), dtype=np.float32)
+    return np.matmul(velocity.T, data["rot_t"], out=out)
+
+
+def on_demand_fields(data, state):
+    """Speed and curvature of the flow at every particle of a (3, N) state, in world units
+
+    Speed is |dx/dt| and the curvature |v x a| / |v|^3, with v the recorded velocity of
+    the last step (see on_demand_velocity) and a its change since the step before, so
+    playback evaluates no derivative. Without two recorded steps the acceleration is the
+    change of the derivative over one Euler step along the flow instead. Only the two
+    returned (N,) float32 arrays are allocated.
+    """
+    workspace = data["workspace"]
+    stage, tmp = workspace["stage"], workspace["tmp"]
+    deriv, params, dt = data["kernel_inplace"], data["params"], data["dt"]
+    velocity, previous = _step_velocities(data, state)
+    if velocity is None:
+        velocity = workspace["k1"]
+        deriv(state, params, velocity, tmp)
+    acceleration = stage
+    if previous is None:
+        # v_prev holds nothing valid here, so it can take the derivative one step ahead
+        ahead = workspace["v_prev"]
+        np.multiply(velocity, dt, out=stage)
+        stage += state
+        deriv(stage, params, ahead, tmp)
+        np.subtract(ahead, velocity, out=acceleration)
+    else:
+        np.subtract(velocity, previous, out=acceleration)
+    acceleration /= dt
+    # |v x a|^2 accumulated one component at a time in the two scratch rows
+    curvature = np.zeros(state.shape[1], dtype=np.float32)
+    for j, k in ((1, 2), (2, 0), (0, 1)):
+        np.multiply(velocity[j], acceleration[k], out=tmp[0])
+        np.multiply(velocity[k], acceleration[j], out=tmp[1])
+        tmp[0] -= tmp[1]
+        tmp[0] *= tmp[0]
+        curvature += tmp[0]
+    np.sqrt(curvature, out=curvature)
+    speed = np.sqrt(np.einsum('ij,ij->j', velocity, velocity))
+    # Where the speed is 0 so is the cross product
+    np.multiply(speed, speed, out=tmp[0])
+    tmp[0] *= speed
+    np.divide(curvature, tmp[0], out=curvature, where=tmp[0] > 0)
+    # Rotation keeps both; scaling the positions scales speed and shrinks curvature
+    scale = data["scale"]
+    speed *= scale
+    curvature /= scale
+    return speed, curvature
+
+
+def released_count(num_particles, release_offset, frame):
+    """Number of staggered particles already released at a timeline frame"""
+    if release_offset <= 0:
+        return num_particles
+    if frame < 1:
+        return 0
+    return min(num_particles, (frame - 1) // release_offset + 1)
+
+
+def transform_on_demand_state(data, state, out=None):
+    """Rotate, scale and offset a (3, N) state into an (N, 3) positions array
+
+    Writes into data["positions"] unless another (N, 3) float32 buffer is given.
+    """
+    if out is None:
+        out = data["positions"]
+    np.matmul(state.T, data["rot_t"], out=out)
+    out *= data["scale"]
+    out += data["origin"]
+    return out
@@ -0,0 +1,240 @@
+"""
+Optional JIT-compiled integration backend with a transparent NumPy fallback
+
+When Numba is importable, the derivative functions from attractors.py (and compiled
+custom equations) are JIT-compiled together with per-particle integration loops.
+Without it, or when the NumPy backend is forced, everything runs through the
+vectorized integrators module instead.
+"""
+import threading
+import numpy as np
+from . import integrators
+
+try:
+    import numba
+    from numba.np.unsafe.ndarray import to_fixed_tuple
+except ImportError:
+    numba = None
+
+
+BACKENDS = ('AUTO', 'NUMPY', 'JIT')
+
+# Integration methods with a compiled loop; RK45 always uses the NumPy driver
+_JIT_METHODS = ('EULER', 'RK4')
+
+_jit_derivatives = {}
+_jit_loops = {}
+_jit_steps = {}
+_jit_sweep_loops = {}
+
+# Numba's default workqueue threading layer aborts the process when parallel loops are
+# launched from two threads at once (the live preview worker and the main thread), so
+# every compile and launch of a JIT loop holds this lock.
+_jit_lock = threading.RLock()
+
+
+def jit_available():
+    """Return True if a JIT compiler is importable"""
+    return numba is not None
+
+
+def resolve_backend(requested='AUTO', method='EULER'):
+    """Return the backend ('JIT' or 'NUMPY') that will actually run a request"""
+    if requested == 'NUMPY' or numba is None or method not in _JIT_METHODS:
+        return 'NUMPY'
+    return 'JIT'
+
+
+def _jit_derivative(func):
+    """JIT-compile a derivative function once and reuse it"""
+    kernel = _jit_derivatives.get(func)
+    if kernel is None:
+        kernel = numba.njit(func)
+        _jit_derivatives[func] = kernel
+    return kernel
+
+
+def _build_loops():
+    """Compile the per-particle integration loops on first use"""
+    if _jit_loops:
+        return _jit_loops
+
+    # Steps also return the derivative they started from, for loops recording velocities
+    @numba.njit(inline='always')
+    def euler(deriv, params, x, y, z, dt):
+        dx, dy, dz = deriv(x, y, z, *params)
+        return x + dx*dt, y + dy*dt, z + dz*dt, dx, dy, dz
+
+    @numba.njit(inline='always')
+    def rk4(deriv, params, x, y, z, dt):
+        h = dt / 2
+        k1x, k1y, k1z = deriv(x, y, z, *params)
+        k2x, k2y, k2z = deriv(x + k1x*h, y + k1y*h, z + k1z*h, *params)
+        k3x, k3y, k3z = deriv(x + k2x*h, y + k2y*h, z + k2z*h, *params)
+        k4x, k4y, k4z = deriv(x + k3x*dt, y + k3y*dt, z + k3z*dt, *params)
+        s = dt / 6
+        return (x + (k1x + 2*k2x + 2*k3x + k4x)*s,
+                y + (k1y + 2*k2y + 2*k3y + k4y)*s,
+                z + (k1z + 2*k2z + 2*k3z + k4z)*s,
+                k1x, k1y, k1z)
+
+    for method, step in (('EULER', euler), ('RK4', rk4)):
+        def make(step):
+            @numba.njit(parallel=True)
+            def integrate(deriv, params, states, dt, out):
+                for p in numba.prange(out.shape[0]):
+                    x = states[p, 0]
+                    y = states[p, 1]
+                    z = states[p, 2]
+                    for k in range(out.shape[1]):
+                        out[p, k, 0] = x
+                        out[p, k, 1] = y
+                        out[p, k, 2] = z
+                        x, y, z, _dx, _dy, _dz = step(deriv, params, x, y, z, dt)
+
+            @numba.njit(parallel=True)
+            def advance(deriv, params, state, dt, steps):
+                # state is (3, N) and updated in place, whatever its float dtype
+                for p in numba.prange(state.shape[1]):
+                    x = state[0, p]
+                    y = state[1, p]
+                    z = state[2, p]
+                    for _ in range(steps):
+                        x, y, z, _dx, _dy, _dz = step(deriv, params, x, y, z, dt)
+                    state[0, p] = x
+                    state[1, p] = y
+                    state[2, p] = z
+
+            @numba.njit(parallel=True)
+            def advance_recording(deriv, params, state, dt, steps, v_last, v_prev):
+                # Like advance, also keeping the derivatives the last two steps started from
+                for p in numba.prange(state.shape[1]):
+                    x = state[0, p]
+                    y = state[1, p]
+                    z = state[2, p]
+                    lx = v_last[0, p]
+                    ly = v_last[1, p]
+                    lz = v_last[2, p]
+                    px = v_prev[0, p]
+                    py = v_prev[1, p]
+                    pz = v_prev[2, p]
+                    for _ in range(steps):
+                        px, py, pz = lx, ly, lz
+                        x, y, z, lx, ly, lz = step(deriv, params, x, y, z, dt)
+                    state[0, p] = x
+                    state[1, p] = y
+                    state[2, p] = z
+                    v_last[0, p] = lx
+                    v_last[1, p] = ly
+                    v_last[2, p] = lz
+                    v_prev[0, p] = px
+                    v_prev[1, p] = py
+                    v_prev[2, p] = pz
+            return integrate, advance, advance_recording
+        _jit_loops[method] = make(step)
+        _jit_steps[method] = step
+    return _jit_loops
+
+
+def _sweep_loop(method, num_params):
+    """Compile the sweep loop, where every trajectory has its own parameter row"""
+    key = (method, num_params)
+    loop = _jit_sweep_loops.get(key)
+    if loop is not None:
+        return loop
+    _build_loops()
+    step = _jit_steps[method]
+
+    @numba.njit(parallel=True)
+    def loop(deriv, params, states, dt, out):
+        for p in numba.prange(out.shape[0]):
+            # A fixed-length tuple so the row can be unpacked into the derivative call
+            row = to_fixed_tuple(params[p], num_params)
+            x = states[p, 0]
+            y = states[p, 1]
+            z = states[p, 2]
+            for k in range(out.shape[1]):
+                out[p, k, 0] = x
+                out[p, k, 1] = y
+                out[p, k, 2] = z
+                x, y, z, _dx, _dy, _dz = step(deriv, row, x, y, z, dt)
+    _jit_sweep_loops[key] = loop
+    return loop
+
+
+def integrate(func, params, states, dt, iterations, out, method='EULER',
+              backend='AUTO', rtol=1e-6, atol=1e-9):
+    """Fill an (N, iterations, 3) array with trajectories starting from (N, 3) states"""
+    params = tuple(float(p) for p in params)
+    if resolve_backend(backend, method) == 'JIT':
+        states = np.ascontiguousarray(states, dtype=np.float64)
+        with _jit_lock:
+            loop = _build_loops()[method][0]
+            loop(_jit_derivative(func), params, states, float(dt), out)
+        return
+    integrators.integrate(lambda x, y, z: func(x, y, z, *params),
+                          np.asarray(states, dtype=np.float64).T.copy(),
+                          dt, iterations, out, method=method, rtol=rtol, atol=atol)
+
+
+def integrate_sweep(func, param_table, states, dt, iterations, out, method='EULER',
+                    backend='AUTO', rtol=1e-6, atol=1e-9):
+    """Like integrate, but trajectory p uses the parameter record param_table[p]
+
+    param_table has shape (N, num_params), one row per (N, 3) starting state.
+    """
+    states = np.ascontiguousarray(states, dtype=np.float64).reshape(-1, 3)
+    table = np.ascontiguousarray(param_table, dtype=np.float64).reshape(states.shape[0], -1)
+    if resolve_backend(backend, method) == 'JIT':
+        with _jit_lock:
+            loop = _sweep_loop(method, table.shape[1])
+            loop(_jit_derivative(func), table, states, float(dt), out)
+        return
+    # Each parameter becomes an (N,) column that broadcasts against the (N,) state rows
+    columns = tuple(table.T)
+    integrators.integrate(lambda x, y, z: func(x, y, z, *columns), states.T.copy(),
+                          dt, iterations, out, method=method, rtol=rtol, atol=atol)
+
+
+def advance(func, params, state, dt, steps, method='EULER',
+            backend='AUTO', rtol=1e-6, atol=1e-9):
+    """Advance a (3, N) state by steps * dt and return the final (3, N) state"""
+    if steps <= 0:
+        return state
+    params = tuple(float(p) for p in params)
+    if resolve_backend(backend, method) == 'JIT':
+        states = np.array(state, dtype=np.float64)
+        with _jit_lock:
+            loop = _build_loops()[method][1]
+            loop(_jit_derivative(func), params, states, float(dt), int(steps))
+        return states.astype(np.asarray(state).dtype)
+    return integrators.advance(lambda x, y, z: func(x, y, z, *params),
+                               state, dt, steps, method, rtol=rtol, atol=atol)
+
+
+def advance_inplace(func, deriv_inplace, params, state, dt, steps, method='EULER',
+                    backend='AUTO', rtol=1e-6, atol=1e-9, workspace=None):
+    """Advance a contiguous (3, N) state buffer in place by steps * dt
+
+    func is the vectorized derivative used by the JIT loops and deriv_inplace its
+    allocation-free counterpart for the NumPy path; workspace comes from
+    integrators.allocate_workspace. RK45 has no in-place driver and copies its result back.
+    A workspace with velocities gets the derivatives of the last two steps (not for RK45).
+    """
+    if steps <= 0:
+        return state
+    params = tuple(float(p) for p in params)
+    if resolve_backend(backend, method) == 'JIT':
+        with _jit_lock:
+            if workspace is not None and "v_last" in workspace:
+                loop = _build_loops()[method][2]
+                loop(_jit_derivative(func), params, state, float(dt), int(steps),
+                     workspace["v_last"], workspace["v_prev"])
+            else:
+                loop = _build_loops()[method][1]
+                loop(_jit_derivative(func), params, state, float(dt), int(steps))
+    elif method == 'RK45':
+        np.copyto(state, advance(func, params, state, dt, steps, method, 'NUMPY', rtol, atol))
+    else:
+        integrators.advance_inplace(deriv_inplace, params, state, dt, steps, method, workspace)
+    return state
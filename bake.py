@@ -0,0 +1,82 @@
+"""
+Memory-mapped position caches on disk, for baked optimized particles and parameter animation
+"""
+import os
+import numpy as np
+from . import attractors, integrators
+
+
+# Custom properties recording a bake on the particle object, so the cache is found again
+# after the .blend is reopened (e.g. on a render farm node).
+CACHE_PATH_PROP = "chaos_cache"
+CACHE_FRAME_START_PROP = "chaos_cache_frame_start"
+# Name of the trail mesh following the particle object, if it was generated with trails
+TRAIL_OBJECT_PROP = "chaos_trail_object"
+# Frames between staggered particle releases, to keep hiding unreleased particles
+CACHE_RELEASE_OFFSET_PROP = "chaos_cache_release_offset"
+# Simulated time between two baked frames, for speed and curvature fields
+CACHE_FRAME_TIME_PROP = "chaos_cache_frame_time"
+
+
+def cache_path(blend_path, obj_name):
+    """Return the cache file for an object, in a folder next to the .blend"""
+    directory = os.path.join(os.path.dirname(blend_path), "chaos_cache")
+    stem = os.path.splitext(os.path.basename(blend_path))[0]
+    return os.path.join(directory, f"{stem}_{obj_name}.npy")
+
+
+def bake_positions(data, path, frame_start, frame_end):
+    """Integrate an on-demand simulation once and stream every frame to a .npy memmap
+
+    Frame f holds the transformed (N, 3) float32 positions the frame handler would show,
+    at row f - frame_start. The live simulation state in data is left untouched.
+    Returns the cache reopened read-only.
+    """
+    state = data["initial_state"].copy()
+    num_particles = state.shape[1]
+    workspace = integrators.allocate_workspace(num_particles, data["integrator"])
+    num_frames = frame_end - frame_start + 1
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    cache = np.lib.format.open_memmap(path, mode='w+', dtype=np.float32,
+                                      shape=(num_frames, num_particles, 3))
+    iteration = 0
+    for row, frame in enumerate(range(frame_start, frame_end + 1)):
+        target_iter = max(0, int((frame - 1) * data["speed_factor"]))
+        if target_iter > iteration:
+            attractors.step_on_demand_state(data, state, iteration, target_iter - iteration, workspace)
+            iteration = target_iter
+        attractors.transform_on_demand_state(data, state, cache[row])
+    cache.flush()
+    del cache
+    return open_cache(path)
+
+
+def save_cache(path, frames):
+    """Write an (F, N, 3) array of per-frame positions as float32 and reopen it mapped"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    np.save(path, np.asarray(frames, dtype=np.float32))
+    return open_cache(path)
+
+
+def open_cache(path):
+    """Open a baked position cache read-only; frames are paged in on access"""
+    return np.load(path, mmap_mode='r')
+
+
+def cached_frame(cache, frame, frame_start):
+    """Return the (N, 3) positions of a frame, clamped to the baked range"""
+    row = min(max(frame - frame_start, 0), cache.shape[0] - 1)
+    return cache[row]
+
+
+def cached_velocity(cache, frame, frame_start):
+    """Return the (N, 3) displacement into a frame (out of the first frame), clamped to the bake"""
+    row = min(max(frame - frame_start, 1), cache.shape[0] - 1)
+    return cache[row] - cache[max(row - 1, 0)]
+
+
+def cached_trail(cache, frame, frame_start, length):
+    """Return the (N, length, 3) positions of the last length frames up to frame, oldest first"""
+    rows = np.arange(frame - length + 1, frame + 1) - frame_start
+    np.clip(rows, 0, cache.shape[0] - 1, out=rows)
+    return np.swapaxes(cache[rows], 0, 1)
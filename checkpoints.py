@@ -0,0 +1,77 @@
+"""
+Memory-bounded state checkpoints for seeking on-demand particle simulations
+"""
+import bisect
+import numpy as np
+
+
+class StateCheckpoints:
+    """Snapshots of a (3, N) particle state taken every `interval` iterations
+
+    When the snapshots would exceed the byte budget, the interval doubles and every
+    snapshot off the new grid is dropped, so memory stays bounded while coverage
+    degrades gracefully over long animations. Iteration 0 is always the initial state.
+    """
+
+    def __init__(self, initial_state, interval=100, budget_bytes=256 * 2**20):
+        self.initial_state = initial_state
+        self.interval = max(1, int(interval))
+        self.budget_bytes = budget_bytes
+        self._iterations = []
+        self._states = {}
+
+    @property
+    def nbytes(self):
+        return len(self._states) * self.initial_state.nbytes
+
+    def nearest(self, iteration):
+        """Return (iteration, state) of the latest checkpoint at or below iteration"""
+        index = bisect.bisect_right(self._iterations, iteration)
+        if index == 0:
+            return 0, self.initial_state
+        found = self._iterations[index - 1]
+        return found, self._states[found]
+
+    def record(self, iteration, state):
+        """Store a copy of the state if iteration lies on the checkpoint grid"""
+        if iteration <= 0 or iteration % self.interval or iteration in self._states:
+            return
+        if self.initial_state.nbytes > self.budget_bytes:
+            return
+        while self.nbytes + state.nbytes > self.budget_bytes:
+            self._thin()
+            if iteration % self.interval:
+                return
+        bisect.insort(self._iterations, iteration)
+        self._states[iteration] = state.copy()
+
+    def _thin(self):
+        """Double the interval and drop every snapshot that is off the new grid"""
+        self.interval *= 2
+        self._iterations = [i for i in self._iterations if i % self.interval == 0]
+        self._states = {i: self._states[i] for i in self._iterations}
+
+    def advance(self, state, start, target, step):
+        """Advance state from iteration start to target, checkpointing on the way
+
+        step(state, start, steps) advances the state in place from iteration start.
+        Returns target.
+        """
+        current = start
+        while current < target:
+            next_stop = min(target, (current // self.interval + 1) * self.interval)
+            step(state, current, next_stop - current)
+            current = next_stop
+            self.record(current, state)
+        return current
+
+    def seek(self, state, current, target):
+        """Restore the best checkpoint for reaching target and return its iteration
+
+        The state is left alone if continuing from current is at least as close.
+        """
+        found, snapshot = self.nearest(target)
+        if current <= target and found <= current:
+            return current
+        np.copyto(state, snapshot)
+        return found
@@ -0,0 +1,77 @@
+"""
+Bulk construction of curve splines from trajectory arrays
+"""
+import bpy
+import numpy as np
+
+
+# Blender's automatic handle length factor (see calchandleNurb_intern in curve.cc)
+_AUTO_HANDLE_FACTOR = 2.5614
+
+
+def auto_handles(points):
+    """Left and right handles of an open Bezier spline with AUTO handles on every point
+
+    Reproduces Blender's automatic handle calculation for all points at once: each
+    handle follows the sum of the unit vectors to the neighbours, with length scaled
+    by the distance to the neighbour on its side. End points mirror their only neighbour.
+    """
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+    if len(points) < 2:
+        return points.copy(), points.copy()
+    prev = np.empty_like(points)
+    nxt = np.empty_like(points)
+    prev[1:] = points[:-1]
+    nxt[:-1] = points[1:]
+    prev[0] = 2 * points[0] - points[1]
+    nxt[-1] = 2 * points[-1] - points[-2]
+    dvec_a = points - prev
+    dvec_b = nxt - points
+    len_a = np.linalg.norm(dvec_a, axis=1)
+    len_b = np.linalg.norm(dvec_b, axis=1)
+    len_a[len_a == 0] = 1.0
+    len_b[len_b == 0] = 1.0
+    tvec = dvec_b / len_b[:, None] + dvec_a / len_a[:, None]
+    length = np.linalg.norm(tvec, axis=1) * _AUTO_HANDLE_FACTOR
+    # Where the neighbours cancel out Blender leaves the handles on the point
+    length[length == 0] = np.inf
+    left = points - tvec * (len_a / length)[:, None]
+    right = points + tvec * (len_b / length)[:, None]
+    return left, right
+
+
+def _handle_type_value(identifier):
+    """Integer value of a Bezier handle type, as foreach_set expects it"""
+    return bpy.types.BezierSplinePoint.bl_rna.properties['handle_left_type'].enum_items[identifier].value
+
+
+def add_poly_spline(curve_data, points):
+    """Append a poly spline through an (n, 3) array, written with one foreach_set"""
+    points = np.asarray(points, dtype=np.float32).reshape(-1, 3)
+    spline = curve_data.splines.new('POLY')
+    spline.points.add(len(points) - 1)
+    co = np.ones((len(points), 4), dtype=np.float32)
+    co[:, :3] = points
+    spline.points.foreach_set("co", co.ravel())
+    return spline
+
+
+def add_bezier_spline(curve_data, points, resolution=None):
+    """Append a Bezier spline with AUTO handles through an (n, 3) array
+
+    Coordinates and precomputed handles are each written with one foreach_set.
+    """
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+    left, right = auto_handles(points)
+    spline = curve_data.splines.new('BEZIER')
+    spline.bezier_points.add(len(points) - 1)
+    bezier_points = spline.bezier_points
+    auto = np.full(len(points), _handle_type_value('AUTO'), dtype=np.int32)
+    bezier_points.foreach_set("handle_left_type", auto)
+    bezier_points.foreach_set("handle_right_type", auto)
+    bezier_points.foreach_set("co", points.astype(np.float32).ravel())
+    bezier_points.foreach_set("handle_left", left.astype(np.float32).ravel())
+    bezier_points.foreach_set("handle_right", right.astype(np.float32).ravel())
+    if resolution is not None:
+        spline.resolution_u = resolution
+    return spline
@@ -0,0 +1,110 @@
+"""
+Safe compilation of custom attractor equations into vectorized kernels
+"""
+import ast
+import math
+import functools
+import numpy as np
+
+
+# Variables and parameters a custom equation may reference, in kernel argument order
+KERNEL_ARGS = ('x', 'y', 'z', 'a', 'b', 'c', 'd', 'e', 'f')
+
+# Whitelisted functions, all NumPy ufuncs so kernels work on scalars and arrays alike
+_FUNCTIONS = {
+    'sin': np.sin, 'cos': np.cos, 'tan': np.tan,
+    'asin': np.arcsin, 'acos': np.arccos, 'atan': np.arctan, 'atan2': np.arctan2,
+    'arcsin': np.arcsin, 'arccos': np.arccos, 'arctan': np.arctan, 'arctan2': np.arctan2,
+    'sinh': np.sinh, 'cosh': np.cosh, 'tanh': np.tanh,
+    'exp': np.exp, 'log': np.log, 'log10': np.log10, 'sqrt': np.sqrt,
+    'abs': np.abs, 'fabs': np.fabs, 'floor': np.floor, 'ceil': np.ceil,
+    'pow': np.power, 'power': np.power, 'sign': np.sign,
+    'minimum': np.minimum, 'maximum': np.maximum,
+}
+_CONSTANTS = {'pi': math.pi, 'tau': math.tau}
+
+# Equations written against math.* or np.* resolve to the same whitelisted ufuncs
+_MODULE_ALIASES = ('math', 'np', 'numpy')
+_MODULE_ATTRIBUTES = set(_FUNCTIONS) | set(_CONSTANTS) | {'e'}
+
+_ALLOWED_NODES = (
+    ast.Expression, ast.BinOp, ast.UnaryOp, ast.Call, ast.Name, ast.Load,
+    ast.Constant, ast.Attribute,
+    ast.Add, ast.Sub, ast.Mult, ast.Div, ast.Pow, ast.Mod, ast.FloorDiv,
+    ast.UAdd, ast.USub,
+)
+
+
+def _validate(tree, label):
+    """Raise ValueError if the parsed equation uses anything outside the whitelist"""
+    # Functions are only valid as the callee of a call; as values they fail in the kernel
+    callees = {id(node.func) for node in ast.walk(tree) if isinstance(node, ast.Call)}
+    for node in ast.walk(tree):
+        if not isinstance(node, _ALLOWED_NODES):
+            raise ValueError(f"{label}: '{type(node).__name__}' is not allowed in equations")
+        if isinstance(node, ast.Constant) and (isinstance(node.value, bool) or not isinstance(node.value, (int, float))):
+            raise ValueError(f"{label}: only numeric constants are allowed")
+        if isinstance(node, ast.Attribute):
+            if not (isinstance(node.value, ast.Name) and node.value.id in _MODULE_ALIASES
+                    and node.attr in _MODULE_ATTRIBUTES):
+                raise ValueError(f"{label}: unknown function '{ast.unparse(node)}'")
+            if node.attr in _FUNCTIONS and id(node) not in callees:
+                raise ValueError(f"{label}: function '{ast.unparse(node)}' must be called, as in {ast.unparse(node)}(...)")
+        if isinstance(node, ast.Name):
+            if node.id not in KERNEL_ARGS and node.id not in _FUNCTIONS \
+                    and node.id not in _CONSTANTS and node.id not in _MODULE_ALIASES:
+                raise ValueError(f"{label}: unknown name '{node.id}'")
+            if node.id in _FUNCTIONS and id(node) not in callees:
+                raise ValueError(f"{label}: function '{node.id}' must be called, as in {node.id}(...)")
+        if isinstance(node, ast.Call):
+            if node.keywords:
+                raise ValueError(f"{label}: keyword arguments are not allowed")
+            if not isinstance(node.func, (ast.Name, ast.Attribute)):
+                raise ValueError(f"{label}: only direct function calls are allowed")
+            if isinstance(node.func, ast.Name) and node.func.id not in _FUNCTIONS:
+                raise ValueError(f"{label}: unknown function '{node.func.id}'")
+
+
+class _StripModules(ast.NodeTransformer):
+    """Rewrite math.sin / np.sin style references into bare whitelisted names"""
+
+    def visit_Attribute(self, node):
+        if node.attr == 'e':
+            # math.e must not collide with the e parameter
+            return ast.copy_location(ast.Constant(value=math.e), node)
+        return ast.copy_location(ast.Name(id=node.attr, ctx=ast.Load()), node)
+
+
+def parse_equation(source, label="equation"):
+    """Parse and whitelist a single equation string, returning its expression AST"""
+    try:
+        tree = ast.parse(source.strip(), mode='eval')
+    except SyntaxError as exc:
+        raise ValueError(f"{label}: {exc.msg}") from None
+    _validate(tree, label)
+    tree = _StripModules().visit(tree)
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name) and node.id in _MODULE_ALIASES:
+            raise ValueError(f"{label}: '{node.id}' can only be used as {node.id}.<function>")
+    return tree.body
+
+
+@functools.lru_cache(maxsize=32)
+def compile_custom_equations(eqn_x, eqn_y, eqn_z):
+    """Compile the three custom equations into a single vectorized derivative kernel
+
+    The returned function has the signature kernel(x, y, z, a, b, c, d, e, f) and
+    returns (dx, dy, dz). Each distinct set of equation strings is parsed, checked
+    and compiled only once; invalid equations raise ValueError. The kernel only
+    references NumPy ufuncs by bare name, so the JIT backend can compile it as is.
+    """
+    bodies = [parse_equation(eqn_x, "dx/dt"),
+              parse_equation(eqn_y, "dy/dt"),
+              parse_equation(eqn_z, "dz/dt")]
+    func = ast.Expression(body=ast.Lambda(
+        args=ast.arguments(posonlyargs=[], args=[ast.arg(arg=name) for name in KERNEL_ARGS],
+                           kwonlyargs=[], kw_defaults=[], defaults=[]),
+        body=ast.Tuple(elts=bodies, ctx=ast.Load())))
+    ast.fix_missing_locations(func)
+    namespace = {"__builtins__": {}, **_FUNCTIONS, **_CONSTANTS}
+    return eval(compile(func, "<custom attractor>", "eval"), namespace)
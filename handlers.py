@@ -1,35 +1,187 @@
 """
 Frame handlers, live preview functionality, and global simulation data
 """
+import os
+import threading
+import time
 import bpy
 import bpy.app.handlers
-import mathutils
 import numpy as np
-from . import simulation, materials, attractors
+from . import simulation, materials, attractors, expressions, bake, curves, keyframes
 
 
 # Global dictionary to store optimized simulation data:
 # In on‑demand mode, each entry stores the initial state, current state,
 # last computed frame, simulation parameters and transformation parameters.
-# For precomputed simulation (non‑on‑demand), the dictionary stores the full positions array and a speed factor.
+# For baked simulations and cached parameter animation curves, the entry holds the
+# (frames, points, 3) position cache (memory-mapped once on disk) and its first frame.
 _optimized_particles_data = {}
 
+# Live preview bookkeeping: the fingerprint of the inputs the preview was last built from,
+# a re-entrancy flag, the time of the last input change for the debounce timer, the
+# background job in flight together with the fingerprint it is computing, and the
+# remaining refinement passes of a synchronous preview.
+_preview_state = {"fingerprint": None, "busy": False, "changed_at": 0.0,
+                  "job": None, "pending": None, "refine": None, "error": None}
+
+# Background preview jobs integrate this many iterations between cancellation checks,
+# and the main thread polls for finished passes at this interval (seconds).
+_PREVIEW_CHUNK = 5000
+_PREVIEW_POLL = 0.05
+
+PREVIEW_NAME = "CHAOS_PREVIEW"
+
+# Boolean point attribute on staggered particle meshes; the instancer only
+# instances particles where it is set
+RELEASED_ATTRIBUTE = "chaos_released"
+# Euler rotation point attribute turning instances along their velocity (Follow Curve Heading)
+ROTATION_ATTRIBUTE = "chaos_rotation"
+# Float point attribute mapped onto the color range by the shared attribute material, and the
+# object property recording what it measures (RANDOM factors are written once, at generation)
+COLOR_ATTRIBUTE = "chaos_color_factor"
+COLOR_SOURCE_PROP = "chaos_color_source"
+# Float point attributes with the local speed and curvature of the flow, on particle and
+# trail meshes generated with Speed/Curvature Fields
+SPEED_ATTRIBUTE = "chaos_speed"
+CURVATURE_ATTRIBUTE = "chaos_curvature"
+
+# Ways of uploading particle positions to a mesh, compared by the vertex write benchmark.
+# FOREACH_CO is what the frame handler uses.
+VERTEX_WRITE_STRATEGIES = ('FOREACH_CO', 'POSITION_ATTRIBUTE', 'PER_VERTEX')
+
+
+def preview_fingerprint(scn):
+    """Tuple of every scene input that changes the live preview curve"""
+    attractor_type = scn.chaos_attractor_type
+    spec = attractors.get_spec(attractor_type)
+    props = [prop for prop, _ in spec.params]
+    frame = None
+    if scn.chaos_mode == 'PARAMETER_ANIMATION':
+        frame = (scn.frame_current, scn.chaos_animation_frames)
+        if spec.animated:
+            props = [prop + suffix for prop in spec.anim_props for suffix in ("_start", "_end")]
+    material = (scn.chaos_use_custom_material, scn.chaos_custom_material, scn.chaos_use_color_range,
+                tuple(scn.chaos_color_min), tuple(scn.chaos_color),
+                scn.chaos_use_emission, scn.chaos_emission_strength)
+    return (scn.chaos_mode, attractor_type, tuple(getattr(scn, prop) for prop in props), frame,
+            attractors.equations_from_scene(scn) if attractor_type == 'CUSTOM' else None,
+            scn.chaos_num_frames, scn.chaos_dt, scn.chaos_integrator, scn.chaos_integrator_tolerance,
+            scn.chaos_backend, scn.chaos_rot_x, scn.chaos_rot_y, scn.chaos_rot_z, scn.chaos_scale,
+            tuple(scn.cursor.location), scn.chaos_transform_mode, material)
+
 
 @bpy.app.handlers.persistent
 def update_live_preview(dummy):
-    """Update live preview when parameters change"""
+    """Update live preview when parameters change
+
+    Runs on every depsgraph update, including the ones the preview rebuild itself
+    causes, so it bails out early unless an input of the curve actually changed.
+    With a debounce window, the rebuild waits until the inputs have settled.
+    """
     scn = bpy.context.scene
-    preview_name = "CHAOS_PREVIEW"
     if not scn.chaos_live_preview:
-        preview_obj = bpy.data.objects.get(preview_name)
+        preview_obj = bpy.data.objects.get(PREVIEW_NAME)
         if preview_obj:
             bpy.data.objects.remove(preview_obj, do_unlink=True)
+        _preview_state["fingerprint"] = None
+        _cancel_preview_job()
+        return
+    if _preview_state["busy"]:
+        return
+    fingerprint = preview_fingerprint(scn)
+    if fingerprint == _preview_state["fingerprint"] and bpy.data.objects.get(PREVIEW_NAME):
         return
+    if scn.chaos_preview_debounce > 0:
+        _preview_state["changed_at"] = time.perf_counter()
+        if not bpy.app.timers.is_registered(_debounced_preview):
+            bpy.app.timers.register(_debounced_preview, first_interval=scn.chaos_preview_debounce)
+        return
+    _rebuild_preview(scn, fingerprint)
+
+
+def _debounced_preview():
+    """Timer callback rebuilding the preview once the inputs stopped changing"""
+    scn = bpy.context.scene
+    remaining = scn.chaos_preview_debounce - (time.perf_counter() - _preview_state["changed_at"])
+    if remaining > 0:
+        # Inputs changed again while waiting; check back when the window has passed
+        return remaining
+    if scn.chaos_live_preview and not _preview_state["busy"]:
+        _rebuild_preview(scn, preview_fingerprint(scn))
+    return None
+
+
+def _rebuild_preview(scn, fingerprint):
+    """Rebuild the preview curve now, or hand the integration to the background worker"""
+    if fingerprint == _preview_state["pending"]:
+        # That exact parameter set is already being integrated
+        return
+    inputs = preview_inputs(scn)
+    if inputs is None:
+        _preview_state["fingerprint"] = fingerprint
+        return
+    passes = preview_passes(inputs["iterations"], scn.chaos_preview_points)
+    if scn.chaos_preview_background:
+        _submit_preview_job(inputs, fingerprint, passes)
+        return
+    _cancel_preview_job()
+    _apply_preview(scn, inputs, compute_preview(inputs, length=passes[0]), fingerprint)
+    if len(passes) > 1:
+        _preview_state["refine"] = {"inputs": inputs, "fingerprint": fingerprint, "passes": passes[1:]}
+        if not bpy.app.timers.is_registered(_refine_preview):
+            bpy.app.timers.register(_refine_preview, first_interval=_PREVIEW_POLL)
+
+
+def preview_passes(iterations, budget):
+    """Trajectory lengths of the progressive preview passes
+
+    The first pass shows only the point budget so edits give immediate feedback;
+    each later pass is four times longer until the full iteration count is reached.
+    The passes extend the cached trajectory, so refining never re-integrates the prefix.
+    """
+    if budget <= 0 or budget >= iterations:
+        return [iterations]
+    passes = []
+    length = budget
+    while length < iterations:
+        passes.append(length)
+        length *= 4
+    passes.append(iterations)
+    return passes
+
+
+def _refine_preview():
+    """Timer callback computing the next pass of a synchronous progressive preview"""
+    refine = _preview_state["refine"]
+    scn = bpy.context.scene
+    if refine is None or not scn.chaos_live_preview:
+        _preview_state["refine"] = None
+        return None
+    length = refine["passes"].pop(0)
+    _apply_preview(scn, refine["inputs"], compute_preview(refine["inputs"], length=length),
+                   refine["fingerprint"])
+    if refine["passes"]:
+        return _PREVIEW_POLL
+    _preview_state["refine"] = None
+    return None
 
-    if scn.chaos_mode == 'PARAMETER_ANIMATION':
-        if scn.chaos_attractor_type == 'CUSTOM':
-            return
 
+def preview_inputs(scn):
+    """Snapshot the scene settings the preview integration needs as plain Python values
+
+    Returns None while custom equations do not compile. The snapshot never touches
+    bpy again, so it can be handed to the background worker.
+    """
+    attractor_type = scn.chaos_attractor_type
+    eqns = attractors.equations_from_scene(scn)
+    if attractor_type == 'CUSTOM':
+        # Leave the previous preview in place while the equations are being edited
+        try:
+            expressions.compile_custom_equations(*eqns)
+        except ValueError:
+            return None
+
+    if scn.chaos_mode == 'PARAMETER_ANIMATION':
         current_frame = scn.frame_current
         anim_frames = scn.chaos_animation_frames
         if current_frame < 1:
@@ -37,121 +189,128 @@ def update_live_preview(dummy):
         if current_frame > anim_frames:
             current_frame = anim_frames
         t = (current_frame - 1) / (anim_frames - 1) if anim_frames > 1 else 0
-        attractor_type = scn.chaos_attractor_type
-        sigma = scn.chaos_sigma
-        rho   = scn.chaos_rho
-        beta  = scn.chaos_beta
-        a_val = scn.chaos_a
-        b_val = scn.chaos_b
-        c_val = scn.chaos_c
-        d_val = scn.chaos_d
-        e_val = scn.chaos_e
-        f_val = scn.chaos_f
-        eqn_x = scn.chaos_eqn_x
-        eqn_y = scn.chaos_eqn_y
-        eqn_z = scn.chaos_eqn_z
-        thomas_b = scn.chaos_thomas_b
-        lang_a = scn.chaos_lang_a
-        lang_b = scn.chaos_lang_b
-        lang_c = scn.chaos_lang_c
-        lang_d = scn.chaos_lang_d
-        lang_e = scn.chaos_lang_e
-        lang_f = scn.chaos_lang_f
-        dad_a = scn.chaos_dad_a
-        dad_b = scn.chaos_dad_b
-        dad_c = scn.chaos_dad_c
-        dad_d = scn.chaos_dad_d
-        dad_e = scn.chaos_dad_e
-        fw_a = scn.chaos_fw_a
-        fw_b = scn.chaos_fw_b
-        fw_c = scn.chaos_fw_c
-        sp_a = scn.chaos_sp_a
-        sp_b = scn.chaos_sp_b
-        halv_a = scn.chaos_halv_a
-        l83_a = scn.chaos_l83_a
-        l83_b = scn.chaos_l83_b
-        l83_f = scn.chaos_l83_f
-        l83_g = scn.chaos_l83_g
-
-        if attractor_type == 'LORENZ':
-            sigma = scn.chaos_sigma_start + t * (scn.chaos_sigma_end - scn.chaos_sigma_start)
-            rho   = scn.chaos_rho_start   + t * (scn.chaos_rho_end   - scn.chaos_rho_start)
-            beta  = scn.chaos_beta_start  + t * (scn.chaos_beta_end  - scn.chaos_beta_start)
-        elif attractor_type == 'ROSSLER':
-            a_val = scn.chaos_a_start + t * (scn.chaos_a_end - scn.chaos_a_start)
-            b_val = scn.chaos_b_start + t * (scn.chaos_b_end - scn.chaos_b_start)
-            c_val = scn.chaos_c_start + t * (scn.chaos_c_end - scn.chaos_c_start)
-        elif attractor_type == 'THOMAS':
-            thomas_b = scn.chaos_thomas_b_start + t * (scn.chaos_thomas_b_end - scn.chaos_thomas_b_start)
-        elif attractor_type == 'LANGFORD':
-            lang_a = scn.chaos_lang_a_start + t * (scn.chaos_lang_a_end - scn.chaos_lang_a_start)
-            lang_b = scn.chaos_lang_b_start + t * (scn.chaos_lang_b_end - scn.chaos_lang_b_start)
-            lang_c = scn.chaos_lang_c_start + t * (scn.chaos_lang_c_end - scn.chaos_lang_c_start)
-            lang_d = scn.chaos_lang_d_start + t * (scn.chaos_lang_d_end - scn.chaos_lang_d_start)
-            lang_e = scn.chaos_lang_e_start + t * (scn.chaos_lang_e_end - scn.chaos_lang_e_start)
-            lang_f = scn.chaos_lang_f_start + t * (scn.chaos_lang_f_end - scn.chaos_lang_f_start)
-        elif attractor_type == 'DADRAS':
-            dad_a = scn.chaos_dad_a_start + t * (scn.chaos_dad_a_end - scn.chaos_dad_a_start)
-            dad_b = scn.chaos_dad_b_start + t * (scn.chaos_dad_b_end - scn.chaos_dad_b_start)
-            dad_c = scn.chaos_dad_c_start + t * (scn.chaos_dad_c_end - scn.chaos_dad_c_start)
-            dad_d = scn.chaos_dad_d_start + t * (scn.chaos_dad_d_end - scn.chaos_dad_d_start)
-            dad_e = scn.chaos_dad_e_start + t * (scn.chaos_dad_e_end - scn.chaos_dad_e_start)
-        elif attractor_type == 'FOURWING':
-            fw_a = scn.chaos_fw_a_start + t * (scn.chaos_fw_a_end - scn.chaos_fw_a_start)
-            fw_b = scn.chaos_fw_b_start + t * (scn.chaos_fw_b_end - scn.chaos_fw_b_start)
-            fw_c = scn.chaos_fw_c_start + t * (scn.chaos_fw_c_end - scn.chaos_fw_c_start)
-        elif attractor_type == 'SPROTT':
-            sp_a = scn.chaos_sp_a_start + t * (scn.chaos_sp_a_end - scn.chaos_sp_a_start)
-            sp_b = scn.chaos_sp_b_start + t * (scn.chaos_sp_b_end - scn.chaos_sp_b_start)
-        elif attractor_type == 'HALVORSEN':
-            halv_a = scn.chaos_halv_a_start + t * (scn.chaos_halv_a_end - scn.chaos_halv_a_start)
-        elif attractor_type == 'LORENZ83':
-            l83_a = scn.chaos_l83_a_start + t * (scn.chaos_l83_a_end - scn.chaos_l83_a_start)
-            l83_b = scn.chaos_l83_b_start + t * (scn.chaos_l83_b_end - scn.chaos_l83_b_start)
-            l83_f = scn.chaos_l83_f_start + t * (scn.chaos_l83_f_end - scn.chaos_l83_f_start)
-            l83_g = scn.chaos_l83_g_start + t * (scn.chaos_l83_g_end - scn.chaos_l83_g_start)
-        # For new attractors 'ARNEODO' and 'RUCKLIDGE' (and CUSTOM) we do not animate parameters
-        points = simulation.generate_points(
-            attractor_type, scn.chaos_num_frames, scn.chaos_dt,
-            sigma, rho, beta,
-            a_val, b_val, c_val,
-            scn.chaos_eqn_x, scn.chaos_eqn_y, scn.chaos_eqn_z,
-            d_val, e_val, f_val,
-            thomas_b,
-            lang_a, lang_b, lang_c, lang_d, lang_e, lang_f,
-            dad_a, dad_b, dad_c, dad_d, dad_e,
-            fw_a, fw_b, fw_c,
-            sp_a, sp_b,
-            halv_a,
-            l83_a, l83_b, l83_f, l83_g,
-            x0=0.1, y0=0.11, z0=0.12
-        )
+        params = attractors.interpolated_params_from_scene(scn, attractor_type, t)
     else:
-        points = simulation.generate_points(
-            scn.chaos_attractor_type, scn.chaos_num_frames, scn.chaos_dt,
-            scn.chaos_sigma, scn.chaos_rho, scn.chaos_beta,
-            scn.chaos_a, scn.chaos_b, scn.chaos_c,
-            scn.chaos_eqn_x, scn.chaos_eqn_y, scn.chaos_eqn_z,
-            scn.chaos_d, scn.chaos_e, scn.chaos_f,
-            scn.chaos_thomas_b,
-            scn.chaos_lang_a, scn.chaos_lang_b, scn.chaos_lang_c,
-            scn.chaos_lang_d, scn.chaos_lang_e, scn.chaos_lang_f,
-            scn.chaos_dad_a, scn.chaos_dad_b, scn.chaos_dad_c,
-            scn.chaos_dad_d, scn.chaos_dad_e,
-            scn.chaos_fw_a, scn.chaos_fw_b, scn.chaos_fw_c,
-            scn.chaos_sp_a, scn.chaos_sp_b,
-            scn.chaos_halv_a,
-            scn.chaos_l83_a, scn.chaos_l83_b, scn.chaos_l83_f, scn.chaos_l83_g,
-            x0=0.1, y0=0.11, z0=0.12
-        )
-
-    points = simulation.rotate_points(points, scn.chaos_rot_x, scn.chaos_rot_y, scn.chaos_rot_z)
-    if scn.chaos_scale != 1.0:
-        points = [(xx*scn.chaos_scale, yy*scn.chaos_scale, zz*scn.chaos_scale) for (xx, yy, zz) in points]
-    origin = bpy.context.scene.cursor.location.copy()
-    points = [(xx + origin[0], yy + origin[1], zz + origin[2]) for (xx, yy, zz) in points]
-
-    preview_obj = bpy.data.objects.get(preview_name)
+        params = attractors.params_from_scene(scn, attractor_type)
+    return {
+        "attractor_type": attractor_type,
+        "params": params,
+        "eqns": eqns,
+        "iterations": scn.chaos_num_frames,
+        "dt": scn.chaos_dt,
+        "integrator": scn.chaos_integrator,
+        "tolerance": scn.chaos_integrator_tolerance,
+        "backend": scn.chaos_backend,
+        "rot": (scn.chaos_rot_x, scn.chaos_rot_y, scn.chaos_rot_z),
+        "scale": scn.chaos_scale,
+        "origin": tuple(scn.cursor.location),
+        "bake_matrix": scn.chaos_transform_mode == 'OBJECT',
+        "cache_size": scn.chaos_cache_size * 2**20,
+    }
+
+
+def compute_preview(inputs, cancel=None, length=None):
+    """Integrate and transform the preview trajectory, returning (points, matrix)
+
+    length limits the trajectory for a coarse pass (default: the full iteration count).
+    Runs on any thread. With a cancel event the trajectory is integrated in chunks, so
+    a newer request stops the work between chunks (returning None); whatever was
+    integrated so far is cached for the next request.
+    """
+    simulation.trajectory_cache.resize(inputs["cache_size"])
+    trajectory = simulation.generate_trajectory(
+        inputs["attractor_type"], inputs["params"], length or inputs["iterations"], inputs["dt"],
+        x0=0.1, y0=0.11, z0=0.12, eqns=inputs["eqns"],
+        integrator=inputs["integrator"], tolerance=inputs["tolerance"],
+        backend=inputs["backend"], chunk=None if cancel is None else _PREVIEW_CHUNK, cancel=cancel
+    )
+    if trajectory is None:
+        return None
+    matrix = simulation.transform_matrix(trajectory, *inputs["rot"], inputs["scale"], inputs["origin"])
+    points = trajectory if inputs["bake_matrix"] else simulation.apply_matrix(trajectory, matrix)
+    return points, matrix
+
+
+def _preview_worker(job):
+    """Background thread body: integrate the passes of one preview request
+
+    Each finished pass is published as the job's result for the poller to show, until
+    the request is superseded.
+    """
+    try:
+        for length in job["passes"]:
+            result = compute_preview(job["inputs"], job["cancel"], length)
+            if result is None or job["cancel"].is_set():
+                break
+            job["result"] = result
+    except Exception as exc:
+        # Shown in the panel by the poller; a worker thread has no operator to report to
+        job["error"] = str(exc)
+    job["done"] = True
+
+
+def preview_error():
+    """Message of the last background preview job that failed, or None"""
+    return _preview_state["error"]
+
+
+def _submit_preview_job(inputs, fingerprint, passes):
+    """Cancel any in-flight preview job and start integrating the new inputs"""
+    _cancel_preview_job()
+    job = {"inputs": inputs, "fingerprint": fingerprint, "passes": passes,
+           "cancel": threading.Event(), "result": None, "applied": None, "done": False, "error": None}
+    _preview_state["job"] = job
+    _preview_state["pending"] = fingerprint
+    threading.Thread(target=_preview_worker, args=(job,), daemon=True).start()
+    if not bpy.app.timers.is_registered(_poll_preview_job):
+        bpy.app.timers.register(_poll_preview_job, first_interval=_PREVIEW_POLL)
+
+
+def _cancel_preview_job():
+    """Signal the in-flight preview job, if any, to stop and drop pending refinements"""
+    job = _preview_state["job"]
+    if job is not None:
+        job["cancel"].set()
+    _preview_state["job"] = None
+    _preview_state["pending"] = None
+    _preview_state["refine"] = None
+
+
+def _poll_preview_job():
+    """Timer callback showing each newly finished preview pass on the main thread"""
+    job = _preview_state["job"]
+    if job is None:
+        return None
+    # Read done first so the final pass is never missed
+    done = job["done"]
+    result = job["result"]
+    scn = bpy.context.scene
+    if result is not None and result is not job["applied"] and scn.chaos_live_preview:
+        job["applied"] = result
+        _apply_preview(scn, job["inputs"], result, job["fingerprint"])
+    if not done:
+        return _PREVIEW_POLL
+    _preview_state["error"] = job["error"]
+    _preview_state["job"] = None
+    _preview_state["pending"] = None
+    return None
+
+
+def _apply_preview(scn, inputs, result, fingerprint):
+    """Write a computed preview into the curve, ignoring the depsgraph updates this triggers"""
+    if result is None:
+        return
+    _preview_state["busy"] = True
+    try:
+        write_live_preview(scn, inputs, *result)
+        _preview_state["fingerprint"] = fingerprint
+    finally:
+        _preview_state["busy"] = False
+
+
+def write_live_preview(scn, inputs, points, matrix):
+    """Write preview points into the preview curve and assign its material"""
+    preview_obj = bpy.data.objects.get(PREVIEW_NAME)
     if preview_obj:
         if not preview_obj.users_collection:
             bpy.context.scene.collection.objects.link(preview_obj)
@@ -159,15 +318,13 @@ def update_live_preview(dummy):
         while curve_data.splines:
             curve_data.splines.remove(curve_data.splines[0])
     else:
-        curve_data = bpy.data.curves.new(preview_name, type='CURVE')
+        curve_data = bpy.data.curves.new(PREVIEW_NAME, type='CURVE')
         curve_data.dimensions = '3D'
-        preview_obj = bpy.data.objects.new(preview_name, curve_data)
+        preview_obj = bpy.data.objects.new(PREVIEW_NAME, curve_data)
         bpy.context.scene.collection.objects.link(preview_obj)
 
-    spline = curve_data.splines.new('POLY')
-    spline.points.add(len(points) - 1)
-    for i, (xx, yy, zz) in enumerate(points):
-        spline.points[i].co = (xx, yy, zz, 1.0)
+    preview_obj.matrix_world = simulation.blender_matrix(matrix if inputs["bake_matrix"] else np.identity(4))
+    curves.add_poly_spline(curve_data, points)
 
     curve_data.bevel_depth = 0.005
     curve_data.resolution_u = 2
@@ -188,94 +345,263 @@ def update_live_preview(dummy):
 
 @bpy.app.handlers.persistent
 def optimized_particles_frame_handler(scene):
-    """Handle frame changes for optimized particle simulations"""
+    """Handle frame changes for optimized particle simulations and cached curves"""
     current_frame = scene.frame_current
     for obj_name, data in _optimized_particles_data.items():
         obj = bpy.data.objects.get(obj_name)
-        if obj is None or obj.type != 'MESH':
+        if obj is None or obj.type not in {'MESH', 'CURVE'}:
             continue
 
-        # Check whether this simulation is on‑demand:
-        if "current_state" in data:
+        trail_obj = bpy.data.objects.get(data.get("trail_object") or "")
+        trail_positions = None
+        # Meshes generated with Follow Curve Heading carry the rotation attribute
+        follow = obj.type == 'MESH' and ROTATION_ATTRIBUTE in obj.data.attributes
+        color_source = obj.get(COLOR_SOURCE_PROP) if obj.type == 'MESH' else None
+        need_velocity = follow or color_source == 'SPEED'
+        velocity = factors = None
+        fields = obj.type == 'MESH' and SPEED_ATTRIBUTE in obj.data.attributes
+        speed = curvature = None
+
+        if "cache" in data:
+            # Baked simulation: read the frame straight from the memory-mapped cache
+            positions = bake.cached_frame(data["cache"], current_frame, data["cache_frame_start"])
+            if need_velocity:
+                velocity = bake.cached_velocity(data["cache"], current_frame, data["cache_frame_start"])
+            if fields:
+                # Central differences over the neighbouring baked frames
+                window = bake.cached_trail(data["cache"], current_frame + 1, data["cache_frame_start"], 3)
+                speed, curvature = simulation.trajectory_fields(window, frame_time(data))
+                speed, curvature = speed[:, 1], curvature[:, 1]
+            if trail_obj is not None:
+                length = len(trail_obj.data.vertices) // max(1, len(positions))
+                trail_positions = bake.cached_trail(data["cache"], current_frame,
+                                                    data["cache_frame_start"], length).reshape(-1, 3)
+        elif "state" in data and obj.type == 'MESH':
             # On‑Demand Simulation Mode
-            speed_factor = data["speed_factor"]
-            # Compute target iteration based on timeline and speed factor.
-            target_iter = int((current_frame - 1) * speed_factor)
-            # If timeline has rewound, reset the simulation.
-            if target_iter < data["last_frame"]:
-                data["current_state"] = (data["initial_state"][0].copy(),
-                                         data["initial_state"][1].copy(),
-                                         data["initial_state"][2].copy())
-                data["last_frame"] = 0
-            x, y, z = data["current_state"]
-            dt = data["dt"]
-            # Unpack simulation parameters
-            attractor_type = data["attractor_type"]
-            sigma = data["sigma"]
-            rho = data["rho"]
-            beta = data["beta"]
-            a_val = data["a_val"]
-            b_val = data["b_val"]
-            c_val = data["c_val"]
-            thomas_b = data["thomas_b"]
-            lang_a = data["lang_a"]
-            lang_b = data["lang_b"]
-            lang_c = data["lang_c"]
-            lang_d = data["lang_d"]
-            lang_e = data["lang_e"]
-            lang_f = data["lang_f"]
-            dad_a = data["dad_a"]
-            dad_b = data["dad_b"]
-            dad_c = data["dad_c"]
-            dad_d = data["dad_d"]
-            dad_e = data["dad_e"]
-            fw_a = data["fw_a"]
-            fw_b = data["fw_b"]
-            fw_c = data["fw_c"]
-            sp_a = data["sp_a"]
-            sp_b = data["sp_b"]
-            halv_a = data["halv_a"]
-            l83_a = data["l83_a"]
-            l83_b = data["l83_b"]
-            l83_f = data["l83_f"]
-            l83_g = data["l83_g"]
-            eqn_x = data["eqn_x"]
-            eqn_y = data["eqn_y"]
-            eqn_z = data["eqn_z"]
-
-            # Advance simulation until we reach target iteration
-            while data["last_frame"] < target_iter:
-                x, y, z = attractors.simulate_step_on_demand(
-                    attractor_type, x, y, z, dt,
-                    sigma, rho, beta,
-                    a_val, b_val, c_val,
-                    thomas_b,
-                    lang_a, lang_b, lang_c, lang_d, lang_e, lang_f,
-                    dad_a, dad_b, dad_c, dad_d, dad_e,
-                    fw_a, fw_b, fw_c,
-                    sp_a, sp_b,
-                    halv_a,
-                    l83_a, l83_b, l83_f, l83_g,
-                    eqn_x, eqn_y, eqn_z,
-                    data.get("d_val", 0.0), data.get("e_val", 0.0), data.get("f_val", 0.0)
-                )
-                data["last_frame"] += 1
-            data["current_state"] = (x, y, z)
-            # Form a (num_particles, 3) array of positions.
-            positions = np.column_stack((x, y, z))
-            # Apply stored transformation: rotation, scale, and add origin.
-            rot = data["rot"]
-            euler = mathutils.Euler(rot, 'XYZ')
-            rot_mat = np.array(euler.to_matrix())
-            positions = positions @ rot_mat.T
-            positions = positions * data["scale"] + np.array(data["origin"])
+            trail = data.get("trail")
+            if trail is not None and trail_obj is not None:
+                update_trail(data, trail, current_frame)
+                trail_positions = trail.ordered()
+            advance_on_demand(data, frame_iteration(data, current_frame))
+            # Apply stored transformation into the preallocated (num_particles, 3) buffer:
+            # rotation, scale, and add origin.
+            positions = attractors.transform_on_demand_state(data, data["state"])
+            if need_velocity:
+                velocity = attractors.on_demand_velocity(data, data["state"])
+            if fields:
+                speed, curvature = attractors.on_demand_fields(data, data["state"])
+        else:
+            continue
+        if obj.type == 'CURVE':
+            write_curve_points(obj.data, positions)
         else:
-            # Fallback: precomputed simulation (if any)
-            positions = data["positions"][min(data["last_frame"], data["positions"].shape[0]-1)]
-        mesh = obj.data
+            write_vertex_positions(obj.data, positions)
+            if data.get("release_offset"):
+                write_released(obj.data, data, current_frame)
+            if follow:
+                write_headings(obj.data, velocity)
+            if color_source in ('SPEED', 'DISTANCE'):
+                factors = color_factors(color_source, positions, velocity)
+                write_color_factors(obj.data, factors)
+            if fields:
+                write_fields(obj.data, speed, curvature)
+        if trail_positions is not None:
+            write_vertex_positions(trail_obj.data, trail_positions)
+            if factors is not None and COLOR_ATTRIBUTE in trail_obj.data.attributes:
+                write_color_factors(trail_obj.data,
+                                    np.repeat(factors, len(trail_positions) // len(positions)))
+            if SPEED_ATTRIBUTE in trail_obj.data.attributes:
+                trail_speed, trail_curvature = simulation.trajectory_fields(
+                    trail_positions.reshape(len(positions), -1, 3), frame_time(data))
+                write_fields(trail_obj.data, trail_speed.ravel(), trail_curvature.ravel())
+
+
+def frame_time(data):
+    """Simulated time between two timeline frames of an optimized simulation"""
+    if "speed_factor" in data:
+        return data["speed_factor"] * data["dt"]
+    return data.get("frame_time", 1.0)
+
+
+def frame_iteration(data, frame):
+    """Iteration an on-demand simulation shows at a timeline frame"""
+    return max(0, int((frame - 1) * data["speed_factor"]))
+
+
+def advance_on_demand(data, target_iter):
+    """Bring an on-demand simulation's state to target_iter, seeking through its checkpoints"""
+    state = data["state"]
+    checkpoints = data["checkpoints"]
+    # If timeline has rewound (or jumped past a stored snapshot), restart from the
+    # nearest checkpoint at or below the target instead of from iteration 0.
+    data["last_frame"] = checkpoints.seek(state, data["last_frame"], target_iter)
+
+    # Advance simulation in place until we reach target iteration
+    if target_iter > data["last_frame"]:
+        def step(state, start, steps):
+            attractors.step_on_demand_state(data, state, start, steps)
+        data["last_frame"] = checkpoints.advance(state, data["last_frame"], target_iter, step)
+
+
+def write_headings(mesh, velocity):
+    """Write the Euler rotations turning each particle along its (N, 3) velocity"""
+    attribute = mesh.attributes.get(ROTATION_ATTRIBUTE)
+    if attribute is None:
+        attribute = mesh.attributes.new(ROTATION_ATTRIBUTE, 'FLOAT_VECTOR', 'POINT')
+    if len(attribute.data) != len(velocity):
+        return
+    attribute.data.foreach_set("vector", keyframes.direction_eulers(velocity).ravel())
+
+
+def color_factors(source, positions, velocity=None):
+    """Per-particle 0..1 color range factors from speed or from distance to the cloud's centre
+
+    Values are divided by twice the frame's mean, so the mapping follows the attractor's
+    scale without jumping when a single particle strays.
+    """
+    if source == 'SPEED':
+        vectors = velocity
+    else:
+        # einsum column sums are several times faster than mean(axis=0) on (N, 3) arrays
+        vectors = positions - np.einsum('ij->j', positions) / len(positions)
+    values = np.sqrt(np.einsum('ij,ij->i', vectors, vectors))
+    mean = values.mean()
+    if mean > 0:
+        values /= 2 * mean
+    return np.clip(values, 0.0, 1.0, out=values)
+
+
+def write_color_factors(mesh, factors):
+    """Write the (N,) color range factors the attribute material reads"""
+    attribute = mesh.attributes.get(COLOR_ATTRIBUTE)
+    if attribute is None:
+        attribute = mesh.attributes.new(COLOR_ATTRIBUTE, 'FLOAT', 'POINT')
+    if len(attribute.data) != len(factors):
+        return
+    attribute.data.foreach_set("value", np.asarray(factors, dtype=np.float32))
+
+
+def write_fields(mesh, speed, curvature):
+    """Write (N,) speed and curvature arrays to the mesh's float point attributes"""
+    for name, values in ((SPEED_ATTRIBUTE, speed), (CURVATURE_ATTRIBUTE, curvature)):
+        attribute = mesh.attributes.get(name)
+        if attribute is None:
+            attribute = mesh.attributes.new(name, 'FLOAT', 'POINT')
+        if len(attribute.data) == len(values):
+            attribute.data.foreach_set("value", np.asarray(values, dtype=np.float32))
+
+
+def write_released(mesh, data, frame):
+    """Update the released attribute of a staggered particle mesh when particles were released"""
+    num_particles = len(mesh.vertices)
+    count = attractors.released_count(num_particles, data["release_offset"], frame)
+    attribute = mesh.attributes.get(RELEASED_ATTRIBUTE)
+    if attribute is None:
+        attribute = mesh.attributes.new(RELEASED_ATTRIBUTE, 'BOOLEAN', 'POINT')
+    elif count == data.get("released_count"):
+        return
+    released = np.zeros(num_particles, dtype=bool)
+    released[:count] = True
+    attribute.data.foreach_set("value", released)
+    data["released_count"] = count
+
+
+def update_trail(data, trail, frame):
+    """Push the frames since the trail's newest sample into its ring buffer
+
+    Playing forward costs one push per frame. After a jump the trail is rebuilt from
+    its first frame, so it always shows the same history for a given frame.
+    """
+    if trail.frame == frame:
+        return
+    first = frame - trail.length + 1
+    if trail.frame is not None and first <= trail.frame < frame:
+        first = trail.frame + 1
+    else:
+        trail.clear()
+    for trail_frame in range(first, frame + 1):
+        advance_on_demand(data, frame_iteration(data, trail_frame))
+        trail.push(trail_frame, attractors.transform_on_demand_state(data, data["state"]))
+
+
+@bpy.app.handlers.persistent
+def save_pending_caches(filepath, *args):
+    """Write caches generated before the .blend had a path next to the file being saved
+
+    Runs before the .blend is written, so the cache link properties are saved with it.
+    The path being saved to is the handler argument (bpy.data.filepath still holds the
+    previous one, which is empty for a new file).
+    """
+    blend_path = filepath if isinstance(filepath, str) and filepath else bpy.data.filepath
+    if not blend_path:
+        return
+    for obj_name, data in _optimized_particles_data.items():
+        obj = bpy.data.objects.get(obj_name)
+        if obj is None or not data.pop("pending_save", False):
+            continue
+        path = bake.cache_path(blend_path, obj_name)
+        data["cache"] = bake.save_cache(path, data["cache"])
+        obj[bake.CACHE_PATH_PROP] = bpy.path.relpath(path, start=os.path.dirname(blend_path))
+        obj[bake.CACHE_FRAME_START_PROP] = data["cache_frame_start"]
+
+
+@bpy.app.handlers.persistent
+def load_baked_caches(dummy):
+    """Reattach baked position caches after a .blend is loaded"""
+    # On-demand states belong to the previous file; only baked caches survive a reload
+    _optimized_particles_data.clear()
+    for obj in bpy.data.objects:
+        path = obj.get(bake.CACHE_PATH_PROP)
+        if path is None:
+            continue
+        path = bpy.path.abspath(path)
+        if not os.path.exists(path):
+            # The object keeps its last written positions until it is baked again
+            continue
+        _optimized_particles_data[obj.name] = {
+            "cache": bake.open_cache(path),
+            "cache_frame_start": obj.get(bake.CACHE_FRAME_START_PROP, 1),
+            "trail_object": obj.get(bake.TRAIL_OBJECT_PROP),
+            "release_offset": obj.get(bake.CACHE_RELEASE_OFFSET_PROP, 0),
+            "frame_time": obj.get(bake.CACHE_FRAME_TIME_PROP, 1.0),
+        }
+
+
+def write_vertex_positions(mesh, positions, strategy='FOREACH_CO'):
+    """Upload an (N, 3) float32 positions array to a mesh with N vertices"""
+    if len(mesh.vertices) != len(positions):
+        # The mesh was edited after generation; there is no 1:1 mapping to write
+        return
+    if strategy == 'PER_VERTEX':
         for i, v in enumerate(mesh.vertices):
             v.co = positions[i]
-        mesh.update()
+    elif strategy == 'POSITION_ATTRIBUTE':
+        mesh.attributes["position"].data.foreach_set("vector", positions.ravel())
+    else:
+        mesh.vertices.foreach_set("co", positions.ravel())
+    mesh.update()
+
+
+def write_curve_points(curve, positions):
+    """Upload an (N, 3) positions array to the first (poly) spline of a curve"""
+    if not curve.splines or len(curve.splines[0].points) != len(positions):
+        return
+    co = np.ones((len(positions), 4), dtype=np.float32)
+    co[:, :3] = positions
+    curve.splines[0].points.foreach_set("co", co.ravel())
+    curve.update_tag()
+
+
+def time_vertex_writes(mesh, positions, repeats=5):
+    """Return the average seconds per frame of each vertex write strategy"""
+    positions = np.ascontiguousarray(positions, dtype=np.float32)
+    timings = {}
+    for strategy in VERTEX_WRITE_STRATEGIES:
+        start = time.perf_counter()
+        for _ in range(repeats):
+            write_vertex_positions(mesh, positions, strategy)
+        timings[strategy] = (time.perf_counter() - start) / repeats
+    return timings
 
 
 def register_handlers():
@@ -284,6 +610,10 @@ def register_handlers():
         bpy.app.handlers.depsgraph_update_post.append(update_live_preview)
     if optimized_particles_frame_handler not in bpy.app.handlers.frame_change_post:
         bpy.app.handlers.frame_change_post.append(optimized_particles_frame_handler)
+    if load_baked_caches not in bpy.app.handlers.load_post:
+        bpy.app.handlers.load_post.append(load_baked_caches)
+    if save_pending_caches not in bpy.app.handlers.save_pre:
+        bpy.app.handlers.save_pre.append(save_pending_caches)
 
 
 def unregister_handlers():
@@ -292,6 +622,17 @@ def unregister_handlers():
         bpy.app.handlers.depsgraph_update_post.remove(update_live_preview)
     if optimized_particles_frame_handler in bpy.app.handlers.frame_change_post:
         bpy.app.handlers.frame_change_post.remove(optimized_particles_frame_handler)
+    if load_baked_caches in bpy.app.handlers.load_post:
+        bpy.app.handlers.load_post.remove(load_baked_caches)
+    if save_pending_caches in bpy.app.handlers.save_pre:
+        bpy.app.handlers.save_pre.remove(save_pending_caches)
+    if bpy.app.timers.is_registered(_debounced_preview):
+        bpy.app.timers.unregister(_debounced_preview)
+    _cancel_preview_job()
+    if bpy.app.timers.is_registered(_poll_preview_job):
+        bpy.app.timers.unregister(_poll_preview_job)
+    if bpy.app.timers.is_registered(_refine_preview):
+        bpy.app.timers.unregister(_refine_preview)
 
 
 def clear_optimized_data():
@@ -303,4 +644,11 @@ def clear_optimized_data():
 def store_optimized_data(obj_name, data):
     """Store optimized simulation data for an object"""
     global _optimized_particles_data
-    _optimized_particles_data[obj_name] = data 
\ No newline at end of file
+    _optimized_particles_data[obj_name] = data 
+
+
+def get_optimized_data(obj_name=None):
+    """Return (name, data) for an optimized simulation, falling back to the first one stored"""
+    if obj_name in _optimized_particles_data:
+        return obj_name, _optimized_particles_data[obj_name]
+    return next(iter(_optimized_particles_data.items()), (None, None))
\ No newline at end of file
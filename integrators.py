@@ -0,0 +1,221 @@
+"""
+Numerical integration schemes shared by every generation mode
+
+All integrators work on a state array of shape (3, ...) holding x, y and z, so the
+same code advances a single point, an (N,) particle ensemble or any other batch.
+The derivative is any callable deriv(x, y, z) -> (dx, dy, dz).
+"""
+import numpy as np
+
+
+INTEGRATORS = ('EULER', 'RK4', 'RK45')
+
+# Dormand-Prince 5(4) tableau
+_DP_C = (0.0, 1/5, 3/10, 4/5, 8/9, 1.0)
+_DP_A = (
+    (),
+    (1/5,),
+    (3/40, 9/40),
+    (44/45, -56/15, 32/9),
+    (19372/6561, -25360/2187, 64448/6561, -212/729),
+    (9017/3168, -355/33, 46732/5247, 49/176, -5103/18656),
+)
+_DP_B = (35/384, 0.0, 500/1113, 125/192, -2187/6784, 11/84)
+# Difference between the 5th and embedded 4th order weights (includes the FSAL stage)
+_DP_E = (71/57600, 0.0, -71/16695, 71/1920, -17253/339200, 22/525, -1/40)
+# Coefficients of the continuous extension used for dense output
+_DP_P = np.array([
+    [1.0, -8048581381/2820520608, 8663915743/2820520608, -12715105075/11282082432],
+    [0.0, 0.0, 0.0, 0.0],
+    [0.0, 131558114200/32700410799, -68118460800/10900136933, 87487479700/32700410799],
+    [0.0, -1754552775/470086768, 14199869525/1410260304, -10690763975/1880347072],
+    [0.0, 127303824393/49829197408, -318862633887/49829197408, 701980252875/199316789632],
+    [0.0, -282668133/205662961, 2019193451/616988883, -1453857185/822651844],
+    [0.0, 40617522/29380423, -110615467/29380423, 69997945/29380423],
+])
+
+
+def evaluate(deriv, state):
+    """Evaluate the derivative of a (3, ...) state, returning an array of the same shape"""
+    dx, dy, dz = deriv(state[0], state[1], state[2])
+    rate = np.empty_like(state)
+    # Assigning component-wise broadcasts constant (scalar) derivatives
+    rate[0] = dx
+    rate[1] = dy
+    rate[2] = dz
+    return rate
+
+
+def euler_step(deriv, state, dt):
+    """Advance a state by one forward Euler step"""
+    return state + evaluate(deriv, state) * dt
+
+
+def rk4_step(deriv, state, dt):
+    """Advance a state by one classical fourth order Runge-Kutta step"""
+    k1 = evaluate(deriv, state)
+    k2 = evaluate(deriv, state + k1 * (dt / 2))
+    k3 = evaluate(deriv, state + k2 * (dt / 2))
+    k4 = evaluate(deriv, state + k3 * dt)
+    return state + (k1 + 2*k2 + 2*k3 + k4) * (dt / 6)
+
+
+_FIXED_STEPS = {'EULER': euler_step, 'RK4': rk4_step}
+
+
+def _dopri_attempt(deriv, state, k1, h):
+    """Take one trial Dormand-Prince step, returning the new state and all stages"""
+    stages = [k1]
+    for i in range(1, 6):
+        increment = sum(a * k for a, k in zip(_DP_A[i], stages))
+        stages.append(evaluate(deriv, state + increment * h))
+    new_state = state + sum(b * k for b, k in zip(_DP_B, stages)) * h
+    stages.append(evaluate(deriv, new_state))
+    return new_state, stages
+
+
+def _dopri_error(state, new_state, stages, h, rtol, atol):
+    """Scaled RMS error estimate of a trial step, worst case over the batch"""
+    error = sum(e * k for e, k in zip(_DP_E, stages)) * h
+    scale = atol + np.maximum(np.abs(state), np.abs(new_state)) * rtol
+    ratio = error / scale
+    norm = np.sqrt(np.mean(ratio * ratio, axis=0))
+    # Diverged particles should neither stall the controller for the whole ensemble nor,
+    # by turning the maximum into NaN, switch error control off for the healthy ones
+    norm = norm[np.isfinite(norm)]
+    return float(np.max(norm)) if norm.size else 0.0
+
+
+def _dopri_adaptive(deriv, state, dt, iterations, rtol, atol, sample):
+    """Integrate with adaptive Dormand-Prince steps, sampling every dt via dense output
+
+    sample(k, point) is called for k = 0 .. iterations - 1 with the state at time k * dt.
+    Returns the state at the last sample time.
+    """
+    sample(0, state)
+    t_end = (iterations - 1) * dt
+    t = 0.0
+    h = dt
+    next_k = 1
+    k1 = evaluate(deriv, state)
+    while next_k < iterations:
+        h = min(h, t_end - t)
+        new_state, stages = _dopri_attempt(deriv, state, k1, h)
+        err = _dopri_error(state, new_state, stages, h, rtol, atol)
+        if err > 1.0:
+            h *= max(0.2, 0.9 * err ** -0.2)
+            continue
+        t_new = t + h
+        q = np.tensordot(_DP_P.T, np.array(stages), axes=1)
+        while next_k < iterations and next_k * dt <= t_new + 1e-12 * dt:
+            theta = (next_k * dt - t) / h
+            powers = np.cumprod(np.full(4, theta))
+            sample(next_k, state + h * np.tensordot(powers, q, axes=1))
+            next_k += 1
+        t = t_new
+        state = new_state
+        k1 = stages[-1]
+        h *= min(10.0, 0.9 * err ** -0.2) if err > 0 else 10.0
+    return state
+
+
+def integrate(deriv, state, dt, iterations, out, method='EULER', rtol=1e-6, atol=1e-9):
+    """Fill out[..., k, :] with the state at time k * dt for k = 0 .. iterations - 1
+
+    state has shape (3, ...) and out must have shape state.shape[1:] + (iterations, 3).
+    """
+    if iterations < 1:
+        return
+    state = np.asarray(state, dtype=np.float64)
+
+    def sample(k, point):
+        out[..., k, :] = np.moveaxis(point, 0, -1)
+
+    if method == 'RK45':
+        _dopri_adaptive(deriv, state, dt, iterations, rtol, atol, sample)
+        return
+    step = _FIXED_STEPS.get(method, euler_step)
+    for k in range(iterations):
+        sample(k, state)
+        if k < iterations - 1:
+            state = step(deriv, state, dt)
+
+
+def advance(deriv, state, dt, steps, method='EULER', rtol=1e-6, atol=1e-9):
+    """Advance a (3, ...) state by steps * dt and return only the final state"""
+    if steps <= 0:
+        return state
+    if method == 'RK45':
+        final = []
+        _dopri_adaptive(deriv, np.asarray(state, dtype=np.float64), dt, steps + 1, rtol, atol,
+                        lambda k, point: final.append(point) if k == steps else None)
+        return final[0]
+    step = _FIXED_STEPS.get(method, euler_step)
+    for _ in range(steps):
+        state = step(deriv, state, dt)
+    return state
+
+
+def allocate_workspace(num_particles, method='EULER', dtype=np.float32, velocities=False):
+    """Preallocate the stage buffers advance_inplace needs for a (3, num_particles) state
+
+    With velocities the workspace also holds v_last and v_prev, which advance_inplace
+    fills with the derivatives its last two steps started from.
+    """
+    shape = (3, num_particles)
+    workspace = {"k1": np.empty(shape, dtype), "stage": np.empty(shape, dtype),
+                 "tmp": np.empty((2, num_particles), dtype)}
+    if method == 'RK4':
+        for name in ("k2", "k3", "k4"):
+            workspace[name] = np.empty(shape, dtype)
+    if velocities:
+        workspace["v_last"] = np.zeros(shape, dtype)
+        workspace["v_prev"] = np.zeros(shape, dtype)
+    return workspace
+
+
+def _rk4_step_inplace(deriv, params, state, dt, ws):
+    """One RK4 step written entirely into the workspace and state buffers"""
+    k1, k2, k3, k4, stage, tmp = ws["k1"], ws["k2"], ws["k3"], ws["k4"], ws["stage"], ws["tmp"]
+    deriv(state, params, k1, tmp)
+    np.multiply(k1, dt / 2, out=stage)
+    stage += state
+    deriv(stage, params, k2, tmp)
+    np.multiply(k2, dt / 2, out=stage)
+    stage += state
+    deriv(stage, params, k3, tmp)
+    np.multiply(k3, dt, out=stage)
+    stage += state
+    deriv(stage, params, k4, tmp)
+    # state += (k1 + 2*k2 + 2*k3 + k4) * dt/6, accumulated in k2 to keep k1 intact
+    k2 += k3
+    k2 *= 2
+    k2 += k1
+    k2 += k4
+    k2 *= dt / 6
+    state += k2
+
+
+def advance_inplace(deriv, params, state, dt, steps, method='EULER', workspace=None):
+    """Advance a (3, N) state by steps * dt in place without allocating per step
+
+    deriv has the in-place signature deriv(state, params, out, tmp) (see attractors.py)
+    and workspace comes from allocate_workspace. Only EULER and RK4 are supported.
+    Afterwards workspace["k1"] holds the derivative at the start of the last step, and
+    a workspace with velocities shifts the last two of them into v_last and v_prev.
+    """
+    if workspace is None:
+        workspace = allocate_workspace(state.shape[1], method, state.dtype)
+    k1, stage, tmp = workspace["k1"], workspace["stage"], workspace["tmp"]
+    v_last, v_prev = workspace.get("v_last"), workspace.get("v_prev")
+    for i in range(steps):
+        if method == 'RK4':
+            _rk4_step_inplace(deriv, params, state, dt, workspace)
+        else:
+            deriv(state, params, k1, tmp)
+            np.multiply(k1, dt, out=stage)
+            state += stage
+        if v_last is not None and i >= steps - 2:
+            np.copyto(v_prev, v_last)
+            np.copyto(v_last, k1)
+    return state
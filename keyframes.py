@@ -0,0 +1,146 @@
+"""
+Bulk keyframing of trajectories through fcurves instead of keyframe_insert per point
+"""
+import bpy
+import numpy as np
+
+
+def _enum_value(prop, identifier):
+    """Integer value of a Keyframe enum item, as foreach_set expects it"""
+    return bpy.types.Keyframe.bl_rna.properties[prop].enum_items[identifier].value
+
+
+def trajectory_frames(num_points, final_frame, num_frames, offset=0):
+    """Timeline frame of every trajectory point and a mask of the points that keep their key
+
+    Several points can land on the same frame when the animation is sped up; like
+    repeated keyframe_insert calls, only the last point on each frame is kept.
+    """
+    frames = ((np.arange(num_points) + 1) * (final_frame / num_frames)).astype(np.int64) + offset
+    np.maximum(frames, 1, out=frames)
+    keep = np.ones(num_points, dtype=bool)
+    keep[:-1] = frames[1:] != frames[:-1]
+    return frames, keep
+
+
+def heading_eulers(points):
+    """XYZ Euler rotations pointing each local Y axis along the trajectory, Z up
+
+    Matches tangent.to_track_quat('Y', 'Z').to_euler() per point, with forward
+    differences (backward for the last point). The Z angle is unwrapped so the
+    keyframes interpolate the short way round instead of spinning at +-180 degrees.
+    """
+    points = np.asarray(points, dtype=np.float64)
+    tangents = np.zeros_like(points)
+    if len(points) > 1:
+        tangents[:-1] = points[1:] - points[:-1]
+        tangents[-1] = tangents[-2]
+    eulers = direction_eulers(tangents)
+    eulers[:, 2] = np.unwrap(eulers[:, 2])
+    return eulers
+
+
+def direction_eulers(directions):
+    """XYZ Euler rotations pointing each local Y axis along an (n, 3) direction, Z up
+
+    Zero or invalid directions give the identity rotation. Keeps the input's float dtype.
+    """
+    directions = np.asarray(directions)
+    length = np.linalg.norm(directions, axis=1)
+    moving = length > 0
+    length[~moving] = 1.0
+    eulers = np.zeros_like(directions)
+    eulers[:, 0] = np.arcsin(np.clip(directions[:, 2] / length, -1.0, 1.0))
+    eulers[:, 2] = np.arctan2(-directions[:, 0], directions[:, 1])
+    eulers[~moving] = 0.0
+    return eulers
+
+
+def reduce_keys(frames, values, tolerance):
+    """Mask of the keys needed to reproduce values within tolerance by linear interpolation
+
+    Ramer-Douglas-Peucker with a time-based error: a dropped key is compared with the
+    straight line between its kept neighbours evaluated at the key's own frame, so the
+    bound holds for the animation as played back, not just for the path's shape. All
+    segments are refined together each pass, one vectorized sweep over the keys.
+    """
+    frames = np.asarray(frames, dtype=np.float64)
+    values = np.asarray(values, dtype=np.float64).reshape(len(frames), -1)
+    count = len(frames)
+    keep = np.zeros(count, dtype=bool)
+    if count <= 2:
+        keep[:] = True
+        return keep
+    keep[0] = keep[-1] = True
+    inner = np.arange(1, count - 1)
+    while True:
+        kept = np.flatnonzero(keep)
+        # Kept neighbours on either side of every key
+        right = kept[np.searchsorted(kept, inner, side='right')]
+        left = kept[np.searchsorted(kept, inner, side='right') - 1]
+        t = (frames[inner] - frames[left]) / (frames[right] - frames[left])
+        line = values[left] + (values[right] - values[left]) * t[:, None]
+        error = np.linalg.norm(values[inner] - line, axis=1)
+        error[keep[inner]] = 0.0
+        if not (error > tolerance).any():
+            return keep
+        # Keep the worst key of every segment that is still out of tolerance
+        order = np.lexsort((-error, left))
+        first = np.ones(len(order), dtype=bool)
+        first[1:] = left[order][1:] != left[order][:-1]
+        worst = order[first]
+        keep[inner[worst[error[worst] > tolerance]]] = True
+
+
+def set_keyframes(obj, data_path, frames, values, group="Object Transforms", interpolation=None):
+    """Key every component of an (n, k) values array at the given frames in one go
+
+    The action and one fcurve per component are created up front, all keyframe points
+    are allocated at once and filled with foreach_set. Interpolation (unless given) and
+    handle types follow the user preferences, as keyframe_insert would.
+    """
+    values = np.asarray(values, dtype=np.float32).reshape(len(frames), -1)
+    anim = obj.animation_data or obj.animation_data_create()
+    if anim.action is None:
+        anim.action = bpy.data.actions.new(name=f"{obj.name}Action")
+    action = anim.action
+    edit_prefs = bpy.context.preferences.edit
+    interpolation = _enum_value('interpolation', interpolation or edit_prefs.keyframe_new_interpolation_type)
+    handle_type = _enum_value('handle_left_type', edit_prefs.keyframe_new_handle_type)
+    count = len(frames)
+    co = np.empty((count, 2), dtype=np.float32)
+    co[:, 0] = frames
+    for index in range(values.shape[1]):
+        fcurve = action.fcurves.find(data_path, index=index)
+        if fcurve is None:
+            fcurve = action.fcurves.new(data_path, index=index, action_group=group)
+        else:
+            fcurve.keyframe_points.clear()
+        fcurve.keyframe_points.add(count)
+        co[:, 1] = values[:, index]
+        fcurve.keyframe_points.foreach_set("co", co.ravel())
+        fcurve.keyframe_points.foreach_set("interpolation", np.full(count, interpolation, dtype=np.int32))
+        fcurve.keyframe_points.foreach_set("handle_left_type", np.full(count, handle_type, dtype=np.int32))
+        fcurve.keyframe_points.foreach_set("handle_right_type", np.full(count, handle_type, dtype=np.int32))
+        # Sorts the points and recalculates the automatic handles
+        fcurve.update()
+
+
+def key_trajectory(obj, points, final_frame, num_frames, offset=0, follow_curve=False,
+                   tolerance=0.0):
+    """Keyframe an object's location (and heading) along an (n, 3) trajectory
+
+    With a positive tolerance, keys that linear interpolation reproduces within that
+    distance are dropped (see reduce_keys) and the remaining keys are linear.
+    """
+    points = np.asarray(points, dtype=np.float64)
+    frames, keep = trajectory_frames(len(points), final_frame, num_frames, offset)
+    interpolation = None
+    if tolerance > 0:
+        index = np.flatnonzero(keep)
+        keep[index[~reduce_keys(frames[index], points[index], tolerance)]] = False
+        interpolation = 'LINEAR'
+    set_keyframes(obj, "location", frames[keep], points[keep], interpolation=interpolation)
+    if follow_curve:
+        set_keyframes(obj, "rotation_euler", frames[keep], heading_eulers(points)[keep],
+                      interpolation=interpolation)
@@ -44,4 +44,53 @@ def create_uniform_material(color, use_emission, emission_strength):
             links.new(bsdf.outputs["BSDF"], add_node.inputs[0])
             links.new(emission_node.outputs["Emission"], add_node.inputs[1])
             links.new(add_node.outputs["Shader"], out_node.inputs["Surface"])
-        return mat 
\ No newline at end of file
+        return mat 
+
+
+def create_attribute_material(color_min, color_max, use_emission, emission_strength, attribute_name,
+                              attribute_type='INSTANCER'):
+    """Create or update the shared material coloring instances from a 0..1 factor attribute
+
+    An Attribute node (Instancer) reads the factor of each instance and a color ramp maps
+    it between the min and max colors, so any number of particles share one material.
+    With attribute_type 'GEOMETRY' the factor is read from the shaded geometry itself,
+    as regular meshes such as trail tubes need; that variant is a separate material.
+    """
+    mat_name = "ChaoticMat_Attribute" if attribute_type == 'INSTANCER' else "ChaoticMat_Attribute_Geometry"
+    mat = bpy.data.materials.get(mat_name)
+    if mat is None:
+        mat = bpy.data.materials.new(mat_name)
+    mat.use_nodes = True
+    nt = mat.node_tree
+    nodes = nt.nodes
+    links = nt.links
+    nodes.clear()
+    out_node = nodes.new(type='ShaderNodeOutputMaterial')
+    out_node.location = (600, 0)
+    attribute_node = nodes.new(type='ShaderNodeAttribute')
+    attribute_node.location = (-500, 0)
+    attribute_node.attribute_type = attribute_type
+    attribute_node.attribute_name = attribute_name
+    ramp = nodes.new(type='ShaderNodeValToRGB')
+    ramp.location = (-300, 0)
+    ramp.color_ramp.elements[0].color = (color_min[0], color_min[1], color_min[2], 1.0)
+    ramp.color_ramp.elements[1].color = (color_max[0], color_max[1], color_max[2], 1.0)
+    links.new(attribute_node.outputs["Fac"], ramp.inputs["Fac"])
+    bsdf = nodes.new(type='ShaderNodeBsdfPrincipled')
+    bsdf.name = "Principled BSDF"
+    bsdf.location = (0, 0)
+    links.new(ramp.outputs["Color"], bsdf.inputs["Base Color"])
+    if not use_emission:
+        links.new(bsdf.outputs["BSDF"], out_node.inputs["Surface"])
+    else:
+        emission_node = nodes.new(type='ShaderNodeEmission')
+        emission_node.name = "Emission"
+        emission_node.location = (0, -150)
+        emission_node.inputs["Strength"].default_value = emission_strength
+        links.new(ramp.outputs["Color"], emission_node.inputs["Color"])
+        add_node = nodes.new(type='ShaderNodeAddShader')
+        add_node.location = (300, 0)
+        links.new(bsdf.outputs["BSDF"], add_node.inputs[0])
+        links.new(emission_node.outputs["Emission"], add_node.inputs[1])
+        links.new(add_node.outputs["Shader"], out_node.inputs["Surface"])
+    return mat
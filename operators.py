@@ -4,10 +4,9 @@ Operator classes and utility functions for chaotic attractors
 import bpy
 import random
 import time
-import mathutils
 import numpy as np
 from bpy.types import Operator
-from . import simulation, materials, attractors, handlers
+from . import simulation, materials, attractors, handlers, expressions, backends, bake, keyframes, curves, trails
 
 
 def get_chaos_collection():
@@ -21,8 +20,18 @@ def get_chaos_collection():
         return chaos_collection
 
 
-def create_geometry_nodes_instancer(obj, particle_obj, material):
-    """Create geometry nodes instancer for optimized particle animation"""
+def generated_object_prefixes():
+    """Name prefixes of every object this add-on generates"""
+    return ("PARTICLE_", "Optimized_Particles") + tuple(f"{key}_" for key in attractors.ATTRACTORS)
+
+
+def create_geometry_nodes_instancer(obj, particle_obj, material, selection_attribute=None,
+                                    rotation_attribute=None):
+    """Create geometry nodes instancer for optimized particle animation
+
+    With a selection attribute, only points where that boolean attribute is set get an
+    instance; a rotation attribute holds the Euler rotation of each instance.
+    """
     node_group = bpy.data.node_groups.new("OptimizedParticleInstancer", 'GeometryNodeTree')
     # Create interface sockets: only one for Geometry (INPUT) and one for Geometry (OUTPUT)
     node_group.interface.new_socket(name="Geometry", in_out='INPUT', socket_type='NodeSocketGeometry')
@@ -58,11 +67,101 @@ def create_geometry_nodes_instancer(obj, particle_obj, material):
     node_group.links.new(instance_node.outputs["Instances"], set_material_node.inputs["Geometry"])
     node_group.links.new(material_node.outputs["Material"], set_material_node.inputs["Material"])
     node_group.links.new(set_material_node.outputs["Geometry"], group_output.inputs["Geometry"])
+
+    if selection_attribute:
+        selection_node = node_group.nodes.new("GeometryNodeInputNamedAttribute")
+        selection_node.location = (-200, -400)
+        selection_node.data_type = 'BOOLEAN'
+        selection_node.inputs["Name"].default_value = selection_attribute
+        node_group.links.new(selection_node.outputs["Attribute"], instance_node.inputs["Selection"])
+
+    if rotation_attribute:
+        rotation_node = node_group.nodes.new("GeometryNodeInputNamedAttribute")
+        rotation_node.location = (-200, -550)
+        rotation_node.data_type = 'FLOAT_VECTOR'
+        rotation_node.inputs["Name"].default_value = rotation_attribute
+        node_group.links.new(rotation_node.outputs["Attribute"], instance_node.inputs["Rotation"])
     
     modifier = obj.modifiers.new("OptimizedParticleInstancer", 'NODES')
     modifier.node_group = node_group
 
 
+def create_trail_mesh(name, num_particles, length):
+    """Create an edge mesh with one chain of length vertices per particle"""
+    mesh = bpy.data.meshes.new(name)
+    edges = trails.trail_edges(num_particles, length)
+    mesh.vertices.add(num_particles * length)
+    mesh.edges.add(len(edges))
+    mesh.edges.foreach_set("vertices", edges.ravel())
+    mesh.update()
+    return mesh
+
+
+def create_field_chain(name, points, dt, parent):
+    """Create an edge chain through a curve's (n, 3) points carrying its speed and curvature
+
+    Curve datablocks cannot hold custom point attributes, so chaos_speed and chaos_curvature
+    live on this companion mesh, parented to the curve object with the same coordinates.
+    Loose edges never render, so the curve looks exactly as without fields.
+    """
+    points = np.asarray(points, dtype=np.float32).reshape(-1, 3)
+    mesh = create_trail_mesh(name, 1, len(points))
+    mesh.vertices.foreach_set("co", points.ravel())
+    handlers.write_fields(mesh, *simulation.trajectory_fields(points, dt))
+    mesh.update()
+    obj = bpy.data.objects.new(name, mesh)
+    obj.parent = parent
+    return obj
+
+
+def create_geometry_nodes_trails(obj, material, radius):
+    """Create geometry nodes turning the trail edge chains into tapered tubes"""
+    node_group = bpy.data.node_groups.new("OptimizedParticleTrails", 'GeometryNodeTree')
+    node_group.interface.new_socket(name="Geometry", in_out='INPUT', socket_type='NodeSocketGeometry')
+    node_group.interface.new_socket(name="Geometry", in_out='OUTPUT', socket_type='NodeSocketGeometry')
+
+    group_input = node_group.nodes.new("NodeGroupInput")
+    group_input.location = (-600, 0)
+    group_output = node_group.nodes.new("NodeGroupOutput")
+    group_output.location = (600, 0)
+
+    # Every particle's chain becomes one spline, running from its oldest sample to the newest
+    mesh_to_curve = node_group.nodes.new("GeometryNodeMeshToCurve")
+    mesh_to_curve.location = (-400, 0)
+
+    # Taper each trail towards its oldest end
+    spline_parameter = node_group.nodes.new("GeometryNodeSplineParameter")
+    spline_parameter.location = (-400, -200)
+    set_radius = node_group.nodes.new("GeometryNodeSetCurveRadius")
+    set_radius.location = (-200, 0)
+
+    profile = node_group.nodes.new("GeometryNodeCurvePrimitiveCircle")
+    profile.location = (-200, -200)
+    profile.inputs["Resolution"].default_value = 6
+    profile.inputs["Radius"].default_value = radius
+
+    curve_to_mesh = node_group.nodes.new("GeometryNodeCurveToMesh")
+    curve_to_mesh.location = (0, 0)
+
+    material_node = node_group.nodes.new("GeometryNodeInputMaterial")
+    material_node.location = (0, 200)
+    material_node.material = material
+    set_material_node = node_group.nodes.new("GeometryNodeSetMaterial")
+    set_material_node.location = (300, 0)
+
+    node_group.links.new(group_input.outputs["Geometry"], mesh_to_curve.inputs["Mesh"])
+    node_group.links.new(mesh_to_curve.outputs["Curve"], set_radius.inputs["Curve"])
+    node_group.links.new(spline_parameter.outputs["Factor"], set_radius.inputs["Radius"])
+    node_group.links.new(set_radius.outputs["Curve"], curve_to_mesh.inputs["Curve"])
+    node_group.links.new(profile.outputs["Curve"], curve_to_mesh.inputs["Profile Curve"])
+    node_group.links.new(curve_to_mesh.outputs["Mesh"], set_material_node.inputs["Geometry"])
+    node_group.links.new(material_node.outputs["Material"], set_material_node.inputs["Material"])
+    node_group.links.new(set_material_node.outputs["Geometry"], group_output.inputs["Geometry"])
+
+    modifier = obj.modifiers.new("OptimizedParticleTrails", 'NODES')
+    modifier.node_group = node_group
+
+
 class CHAOS_OT_generate_animation(Operator):
     """Generate chaotic attractors in multiple modes, including particle trail, particle animation, parameter animation, etc."""
     bl_idname = "chaos.generate_animation"
@@ -77,6 +176,9 @@ class CHAOS_OT_generate_animation(Operator):
         attractor_type = scn.chaos_attractor_type
         num_frames     = scn.chaos_num_frames
         dt             = scn.chaos_dt
+        integrator     = scn.chaos_integrator
+        tolerance      = scn.chaos_integrator_tolerance
+        backend        = scn.chaos_backend
         speed_factor   = scn.chaos_anim_speed
         # Compute final timeline frame (for non-optimized modes)
         final_frame    = int(num_frames / speed_factor)
@@ -85,56 +187,44 @@ class CHAOS_OT_generate_animation(Operator):
 
         color_min = scn.chaos_color_min
         color_max = scn.chaos_color_max
-        sigma = scn.chaos_sigma
-        rho   = scn.chaos_rho
-        beta  = scn.chaos_beta
-        a_val = scn.chaos_a
-        b_val = scn.chaos_b
-        c_val = scn.chaos_c
-        d_val = scn.chaos_d
-        e_val = scn.chaos_e
-        f_val = scn.chaos_f
-        eqn_x = scn.chaos_eqn_x
-        eqn_y = scn.chaos_eqn_y
-        eqn_z = scn.chaos_eqn_z
-        thomas_b = scn.chaos_thomas_b
-        lang_a = scn.chaos_lang_a
-        lang_b = scn.chaos_lang_b
-        lang_c = scn.chaos_lang_c
-        lang_d = scn.chaos_lang_d
-        lang_e = scn.chaos_lang_e
-        lang_f = scn.chaos_lang_f
-        dad_a = scn.chaos_dad_a
-        dad_b = scn.chaos_dad_b
-        dad_c = scn.chaos_dad_c
-        dad_d = scn.chaos_dad_d
-        dad_e = scn.chaos_dad_e
-        fw_a = scn.chaos_fw_a
-        fw_b = scn.chaos_fw_b
-        fw_c = scn.chaos_fw_c
-        sp_a = scn.chaos_sp_a
-        sp_b = scn.chaos_sp_b
-        halv_a = scn.chaos_halv_a
-        l83_a = scn.chaos_l83_a
-        l83_b = scn.chaos_l83_b
-        l83_f = scn.chaos_l83_f
-        l83_g = scn.chaos_l83_g
+        # Compact parameter record of the selected attractor, resolved via the registry
+        params = attractors.params_from_scene(scn, attractor_type)
+        eqns = attractors.equations_from_scene(scn)
+        simulation.trajectory_cache.resize(scn.chaos_cache_size * 2**20)
+        if backend == 'JIT' and not backends.jit_available():
+            self.report({'WARNING'}, "JIT backend requested but Numba is not installed - using NumPy")
+        if attractor_type == 'CUSTOM':
+            try:
+                expressions.compile_custom_equations(*eqns)
+            except ValueError as exc:
+                self.report({'ERROR'}, f"Invalid custom equation - {exc}")
+                return {'CANCELLED'}
         scale_factor = scn.chaos_scale
-        origin = bpy.context.scene.cursor.location.copy()
+        origin = tuple(bpy.context.scene.cursor.location)
+        # Put rotation, scale and position on curve objects instead of their points
+        bake_matrix = scn.chaos_transform_mode == 'OBJECT'
         shape = scn.chaos_particle_shape
         segs = scn.chaos_sphere_segments
         rings = scn.chaos_sphere_rings
         cube_subdiv = scn.chaos_cube_subdiv
         part_size = scn.chaos_particle_size
         bevel_depth = scn.chaos_bevel_depth
+        key_tolerance = scn.chaos_key_tolerance if scn.chaos_reduce_keys else 0.0
+        export_fields = scn.chaos_export_fields
         chaos_collection = get_chaos_collection()
 
         use_color_range = scn.chaos_use_color_range
         use_emission = scn.chaos_use_emission
         emission_str = scn.chaos_emission_strength
 
+        optimized = mode == 'PARTICLE_ANIMATION' and scn.chaos_optimized_mode
+        # Optimized color ranges share one attribute material, created in the optimized branch
+        attribute_colors = optimized and use_color_range and not (
+            scn.chaos_use_custom_material and scn.chaos_custom_material is not None)
         if scn.chaos_use_custom_material and scn.chaos_custom_material is not None:
             mat = scn.chaos_custom_material
+        elif attribute_colors:
+            mat = None
         elif scn.chaos_use_color_range:
             color = scn.chaos_color_min
             mat = materials.create_uniform_material(color, scn.chaos_use_emission, scn.chaos_emission_strength)
@@ -142,7 +232,7 @@ class CHAOS_OT_generate_animation(Operator):
             color = scn.chaos_color
             mat = materials.create_uniform_material(color, scn.chaos_use_emission, scn.chaos_emission_strength)
 
-        if use_color_range:
+        if use_color_range and not optimized:
             color_range_materials = []
             for i in range(10):
                 t = i / 9.0
@@ -173,7 +263,7 @@ class CHAOS_OT_generate_animation(Operator):
                     links.new(emission_node.outputs["Emission"], add_node.inputs[1])
                     links.new(add_node.outputs["Shader"], out_node.inputs["Surface"])
                 color_range_materials.append(mat_temp)
-        else:
+        elif not attribute_colors:
             uniform_mat = materials.create_uniform_material(scn.chaos_color, use_emission, emission_str)
 
         if scn.chaos_use_custom_material and scn.chaos_custom_material is not None:
@@ -184,28 +274,23 @@ class CHAOS_OT_generate_animation(Operator):
         # ########################################################################################################
         # Optimized Mode for PARTICLE_ANIMATION (On‑Demand Computation)
         # ########################################################################################################
-        if mode == 'PARTICLE_ANIMATION' and scn.chaos_optimized_mode:
+        if optimized:
             num_particles = scn.chaos_num_particles
             state = attractors.initialize_on_demand_simulation(
                 attractor_type,
+                params,
                 num_particles,
                 dt,
-                sigma, rho, beta,
-                a_val, b_val, c_val,
-                thomas_b,
-                lang_a, lang_b, lang_c, lang_d, lang_e, lang_f,
-                dad_a, dad_b, dad_c, dad_d, dad_e,
-                fw_a, fw_b, fw_c,
-                sp_a, sp_b,
-                halv_a,
-                l83_a, l83_b, l83_f, l83_g,
-                eqn_x, eqn_y, eqn_z,
-                d_val, e_val, f_val,
                 scn.chaos_offset_scale,
                 origin,
                 scale_factor,
                 scn.chaos_rot_x, scn.chaos_rot_y, scn.chaos_rot_z,
-                speed_factor
+                speed_factor,
+                eqns=eqns,
+                integrator=integrator, tolerance=tolerance, backend=backend,
+                checkpoint_interval=scn.chaos_checkpoint_interval,
+                checkpoint_budget=scn.chaos_checkpoint_budget * 2**20,
+                release_offset=scn.chaos_release_offset if scn.chaos_stagger_release else 0
             )
             # Create particle object
             if shape == 'CUSTOM':
@@ -230,12 +315,58 @@ class CHAOS_OT_generate_animation(Operator):
             # Create a new mesh for the instanced particles using the initial positions.
             mesh = bpy.data.meshes.new("Optimized_Particles")
             # Set up vertices from the initial state
-            x0, y0, z0 = state["initial_state"]
-            verts = [tuple(np.array([x0[i], y0[i], z0[i]])) for i in range(num_particles)]
-            mesh.from_pydata(verts, [], [])
+            mesh.from_pydata(state["initial_state"].T.tolist(), [], [])
             optimized_obj = bpy.data.objects.new("Optimized_Particles_Obj", mesh)
             chaos_collection.objects.link(optimized_obj)
-            create_geometry_nodes_instancer(optimized_obj, base_particle, mat)
+            selection_attribute = rotation_attribute = factors = None
+            if state["release_offset"]:
+                # Unreleased particles are hidden through a point attribute the instancer reads
+                handlers.write_released(mesh, state, scn.frame_current)
+                selection_attribute = handlers.RELEASED_ATTRIBUTE
+            if scn.chaos_follow_curve:
+                # Headings come from the derivative at each frame's state, written as a point attribute
+                handlers.write_headings(mesh, attractors.on_demand_velocity(state, state["state"]))
+                rotation_attribute = handlers.ROTATION_ATTRIBUTE
+            if attribute_colors:
+                # One shared material colors every instance from a per-point factor attribute
+                color_source = scn.chaos_color_source
+                optimized_obj[handlers.COLOR_SOURCE_PROP] = color_source
+                if color_source == 'RANDOM':
+                    factors = np.random.random(num_particles).astype(np.float32)
+                else:
+                    velocity = attractors.on_demand_velocity(state, state["state"])
+                    positions = attractors.transform_on_demand_state(state, state["state"])
+                    factors = handlers.color_factors(color_source, positions, velocity)
+                handlers.write_color_factors(mesh, factors)
+                mat = materials.create_attribute_material(color_min, color_max, use_emission, emission_str,
+                                                          handlers.COLOR_ATTRIBUTE)
+            create_geometry_nodes_instancer(optimized_obj, base_particle, mat,
+                                            selection_attribute, rotation_attribute)
+            if export_fields:
+                # The frame handler keeps the fields up to date once the attributes exist
+                handlers.write_fields(mesh, *attractors.on_demand_fields(state, state["state"]))
+            if scn.chaos_optimized_trails:
+                # Recent positions of every particle live in one ring buffer, drawn as
+                # a single edge mesh instead of a curve object per particle
+                trail_length = scn.chaos_optimized_trail_length
+                trail_mesh = create_trail_mesh("Optimized_Particles_Trails", num_particles, trail_length)
+                trail_obj = bpy.data.objects.new("Optimized_Particles_Trails_Obj", trail_mesh)
+                chaos_collection.objects.link(trail_obj)
+                trail_mat = mat
+                if factors is not None:
+                    # Tubes are not instances, so every trail point carries its particle's factor
+                    handlers.write_color_factors(trail_mesh, np.repeat(factors, trail_length))
+                    trail_mat = materials.create_attribute_material(color_min, color_max, use_emission,
+                                                                    emission_str, handlers.COLOR_ATTRIBUTE,
+                                                                    'GEOMETRY')
+                create_geometry_nodes_trails(trail_obj, trail_mat, bevel_depth)
+                if export_fields:
+                    # Mesh to Curve and Curve to Mesh carry the fields onto the trail tubes
+                    zeros = np.zeros(num_particles * trail_length, dtype=np.float32)
+                    handlers.write_fields(trail_mesh, zeros, zeros)
+                state["trail"] = trails.TrailRing(num_particles, trail_length)
+                state["trail_object"] = trail_obj.name
+                optimized_obj[bake.TRAIL_OBJECT_PROP] = trail_obj.name
             # Store the on-demand simulation state in the global dictionary.
             handlers.store_optimized_data(optimized_obj.name, state)
             end_time = time.time()
@@ -269,29 +400,21 @@ class CHAOS_OT_generate_animation(Operator):
                     sub_mod.render_levels = cube_subdiv
             if base_particle.name in bpy.context.collection.objects:
                 bpy.context.collection.objects.unlink(base_particle)
+            initial_states = [(0.1 + random.uniform(-offset_scale, offset_scale),
+                               0.11 + random.uniform(-offset_scale, offset_scale),
+                               0.12 + random.uniform(-offset_scale, offset_scale))
+                              for _ in range(num_particles)]
+            # Integrate every particle together in one vectorized pass
+            trajectories = simulation.generate_points_batch(
+                attractor_type, params, num_frames, dt, initial_states, eqns=eqns,
+                integrator=integrator, tolerance=tolerance, backend=backend
+            )
             for p in range(num_particles):
-                x_init = 0.1 + random.uniform(-offset_scale, offset_scale)
-                y_init = 0.11 + random.uniform(-offset_scale, offset_scale)
-                z_init = 0.12 + random.uniform(-offset_scale, offset_scale)
-                points = simulation.generate_points(
-                    attractor_type, num_frames, dt,
-                    sigma, rho, beta,
-                    a_val, b_val, c_val,
-                    scn.chaos_eqn_x, scn.chaos_eqn_y, scn.chaos_eqn_z,
-                    d_val, e_val, f_val,
-                    thomas_b,
-                    lang_a, lang_b, lang_c, lang_d, lang_e, lang_f,
-                    dad_a, dad_b, dad_c, dad_d, dad_e,
-                    fw_a, fw_b, fw_c,
-                    sp_a, sp_b,
-                    halv_a,
-                    l83_a, l83_b, l83_f, l83_g,
-                    x0=x_init, y0=y_init, z0=z_init
-                )
-                points = simulation.rotate_points(points, scn.chaos_rot_x, scn.chaos_rot_y, scn.chaos_rot_z)
-                if scale_factor != 1.0:
-                    points = [(xx * scale_factor, yy * scale_factor, zz * scale_factor) for (xx, yy, zz) in points]
-                points = [(xx + origin[0], yy + origin[1], zz + origin[2]) for (xx, yy, zz) in points]
+                matrix = simulation.transform_matrix(trajectories[p], scn.chaos_rot_x, scn.chaos_rot_y,
+                                                     scn.chaos_rot_z, scale_factor, origin)
+                points = simulation.apply_matrix(trajectories[p], matrix)
+                # With the transform on the object, the trail keeps the simulated coordinates
+                curve_points = trajectories[p] if bake_matrix else points
                 if shape == 'CUSTOM':
                     if base_particle.data.materials:
                         local_mat = base_particle.data.materials[0]
@@ -312,7 +435,7 @@ class CHAOS_OT_generate_animation(Operator):
                         part_obj.data = base_particle.data
                 if shape == 'CUSTOM':
                     part_obj.scale = (part_size, part_size, part_size)
-                part_obj.location = points[0]
+                part_obj.location = tuple(points[0])
                 chaos_collection.objects.link(part_obj)
                 part_obj.name = f"{attractor_type}_Particle_{p}"
                 if part_obj.data.materials:
@@ -323,21 +446,16 @@ class CHAOS_OT_generate_animation(Operator):
                 curve_data.dimensions = '3D'
                 curve_data.bevel_depth = bevel_depth
                 if scn.chaos_line_smooth:
-                    spl = curve_data.splines.new('BEZIER')
-                    spl.bezier_points.add(len(points) - 1)
-                    for i, (xx, yy, zz) in enumerate(points):
-                        bp = spl.bezier_points[i]
-                        bp.co = (xx, yy, zz)
-                        bp.handle_left_type = 'AUTO'
-                        bp.handle_right_type = 'AUTO'
-                    spl.resolution_u = scn.chaos_line_resolution
+                    curves.add_bezier_spline(curve_data, curve_points, scn.chaos_line_resolution)
                 else:
-                    spl = curve_data.splines.new('POLY')
-                    spl.points.add(len(points) - 1)
-                    for i, (xx, yy, zz) in enumerate(points):
-                        spl.points[i].co = (xx, yy, zz, 1.0)
+                    curves.add_poly_spline(curve_data, curve_points)
                 curve_obj = bpy.data.objects.new(f"{attractor_type}_TrailLine_{p}", curve_data)
+                if bake_matrix:
+                    curve_obj.matrix_world = simulation.blender_matrix(matrix)
                 chaos_collection.objects.link(curve_obj)
+                if export_fields:
+                    chaos_collection.objects.link(create_field_chain(
+                        f"{curve_obj.name}_Fields", curve_points, dt, curve_obj))
                 if scn.chaos_use_custom_material and scn.chaos_custom_material is not None:
                     local_mat_curve = scn.chaos_custom_material
                 elif use_color_range:
@@ -351,23 +469,11 @@ class CHAOS_OT_generate_animation(Operator):
                 curve_data.use_map_taper = False
                 total_pts = len(points)
                 curve_data.use_fill_caps = True
-                for i, (xx, yy, zz) in enumerate(points):
-                    offset = (p * scn.chaos_release_offset) if scn.chaos_stagger_release else 0
-                    frame = int((i + 1) * (final_frame / num_frames)) + offset
-                    if frame < 1:
-                        frame = 1
-                    part_obj.location = (xx, yy, zz)
-                    part_obj.keyframe_insert(data_path="location", frame=frame)
-                    if scn.chaos_follow_curve:
-                        if i < len(points) - 1:
-                            tangent = (mathutils.Vector(points[i+1]) - mathutils.Vector((xx, yy, zz))).normalized()
-                        elif i > 0:
-                            tangent = (mathutils.Vector((xx, yy, zz)) - mathutils.Vector(points[i-1])).normalized()
-                        else:
-                            tangent = mathutils.Vector((0, 1, 0))
-                        rot_quat = tangent.to_track_quat('Y', 'Z')
-                        part_obj.rotation_euler = rot_quat.to_euler()
-                        part_obj.keyframe_insert(data_path="rotation_euler", frame=frame)
+                offset = (p * scn.chaos_release_offset) if scn.chaos_stagger_release else 0
+                # All location (and heading) keys of the particle are written in bulk
+                keyframes.key_trajectory(part_obj, points, final_frame, num_frames, offset,
+                                         follow_curve=scn.chaos_follow_curve,
+                                         tolerance=key_tolerance)
             scn.frame_start = 1
             scn.frame_end = final_frame
             scn.frame_set(1)
@@ -398,29 +504,18 @@ class CHAOS_OT_generate_animation(Operator):
                     sub_mod.render_levels = cube_subdiv
             if base_particle.name in bpy.context.collection.objects:
                 bpy.context.collection.objects.unlink(base_particle)
+            initial_states = [(0.1 + random.uniform(-offset_scale, offset_scale),
+                               0.11 + random.uniform(-offset_scale, offset_scale),
+                               0.12 + random.uniform(-offset_scale, offset_scale))
+                              for _ in range(num_particles)]
+            # Integrate every particle together in one vectorized pass
+            trajectories = simulation.generate_points_batch(
+                attractor_type, params, num_frames, dt, initial_states, eqns=eqns,
+                integrator=integrator, tolerance=tolerance, backend=backend
+            )
             for p in range(num_particles):
-                x_init = 0.1 + random.uniform(-offset_scale, offset_scale)
-                y_init = 0.11 + random.uniform(-offset_scale, offset_scale)
-                z_init = 0.12 + random.uniform(-offset_scale, offset_scale)
-                points = simulation.generate_points(
-                    attractor_type, num_frames, dt,
-                    sigma, rho, beta,
-                    a_val, b_val, c_val,
-                    eqn_x, eqn_y, eqn_z,
-                    d_val, e_val, f_val,
-                    thomas_b,
-                    lang_a, lang_b, lang_c, lang_d, lang_e, lang_f,
-                    dad_a, dad_b, dad_c, dad_d, dad_e,
-                    fw_a, fw_b, fw_c,
-                    sp_a, sp_b,
-                    halv_a,
-                    l83_a, l83_b, l83_f, l83_g,
-                    x0=x_init, y0=y_init, z0=z_init
-                )
-                points = simulation.rotate_points(points, scn.chaos_rot_x, scn.chaos_rot_y, scn.chaos_rot_z)
-                if scale_factor != 1.0:
-                    points = [(xx * scale_factor, yy * scale_factor, zz * scale_factor) for (xx, yy, zz) in points]
-                points = [(xx + origin[0], yy + origin[1], zz + origin[2]) for (xx, yy, zz) in points]
+                points = simulation.transform_points(trajectories[p], scn.chaos_rot_x, scn.chaos_rot_y,
+                                                     scn.chaos_rot_z, scale_factor, origin)
                 if shape == 'CUSTOM':
                     if base_particle.data.materials:
                         local_mat = base_particle.data.materials[0]
@@ -441,30 +536,18 @@ class CHAOS_OT_generate_animation(Operator):
                         part_obj.data = base_particle.data
                 if shape == 'CUSTOM':
                     part_obj.scale = (part_size, part_size, part_size)
-                part_obj.location = points[0]
+                part_obj.location = tuple(points[0])
                 chaos_collection.objects.link(part_obj)
                 part_obj.name = f"{attractor_type}_Particle_{p}"
                 if part_obj.data.materials:
                     part_obj.data.materials[0] = local_mat
                 else:
                     part_obj.data.materials.append(local_mat)
-                for i, (xx, yy, zz) in enumerate(points):
-                    offset = (p * scn.chaos_release_offset) if scn.chaos_stagger_release else 0
-                    frame = int((i + 1) * (final_frame / num_frames)) + offset
-                    if frame < 1:
-                        frame = 1
-                    part_obj.location = (xx, yy, zz)
-                    part_obj.keyframe_insert(data_path="location", frame=frame)
-                    if scn.chaos_follow_curve:
-                        if i < len(points) - 1:
-                            tangent = (mathutils.Vector(points[i+1]) - mathutils.Vector((xx, yy, zz))).normalized()
-                        elif i > 0:
-                            tangent = (mathutils.Vector((xx, yy, zz)) - mathutils.Vector(points[i-1])).normalized()
-                        else:
-                            tangent = mathutils.Vector((0, 1, 0))
-                        rot_quat = tangent.to_track_quat('Y', 'Z')
-                        part_obj.rotation_euler = rot_quat.to_euler()
-                        part_obj.keyframe_insert(data_path="rotation_euler", frame=frame)
+                offset = (p * scn.chaos_release_offset) if scn.chaos_stagger_release else 0
+                # All location (and heading) keys of the particle are written in bulk
+                keyframes.key_trajectory(part_obj, points, final_frame, num_frames, offset,
+                                         follow_curve=scn.chaos_follow_curve,
+                                         tolerance=key_tolerance)
             scn.frame_start = 1
             scn.frame_end = final_frame
             scn.frame_set(1)
@@ -474,9 +557,6 @@ class CHAOS_OT_generate_animation(Operator):
         # Mode: PARAMETER_ANIMATION
         # ########################################################################################################
         elif mode == 'PARAMETER_ANIMATION':
-            if attractor_type == 'CUSTOM':
-                self.report({'ERROR'}, "Custom attractors are not supported in Parameter Animation mode.")
-                return {'CANCELLED'}
             anim_frames = scn.chaos_animation_frames
             num_points = scn.chaos_num_frames
             curve_name = f"{attractor_type}_Curve_ParameterAnimation"
@@ -499,59 +579,37 @@ class CHAOS_OT_generate_animation(Operator):
             else:
                 curve_data.materials[0] = local_mat_line
 
-            for frame in range(1, anim_frames + 1):
-                scn.frame_set(frame)
-                t = (frame - 1) / (anim_frames - 1) if anim_frames > 1 else 0
-                if attractor_type == 'LORENZ':
-                    sigma_cur = scn.chaos_sigma_start + t * (scn.chaos_sigma_end - scn.chaos_sigma_start)
-                    rho_cur   = scn.chaos_rho_start   + t * (scn.chaos_rho_end - scn.chaos_rho_start)
-                    beta_cur  = scn.chaos_beta_start  + t * (scn.chaos_beta_end - scn.chaos_beta_start)
-                    points = simulation.generate_points('LORENZ', num_points, dt, sigma_cur, rho_cur, beta_cur,
-                              a_val, b_val, c_val,
-                              eqn_x, eqn_y, eqn_z,
-                              d_val, e_val, f_val,
-                              thomas_b,
-                              lang_a, lang_b, lang_c, lang_d, lang_e, lang_f,
-                              dad_a, dad_b, dad_c, dad_d, dad_e,
-                              fw_a, fw_b, fw_c,
-                              sp_a, sp_b,
-                              halv_a,
-                              l83_a, l83_b, l83_f, l83_g,
-                              x0=0.1, y0=0.11, z0=0.12)
-                elif attractor_type == 'ROSSLER':
-                    a_cur = scn.chaos_a_start + t * (scn.chaos_a_end - scn.chaos_a_start)
-                    b_cur = scn.chaos_b_start + t * (scn.chaos_b_end - scn.chaos_b_start)
-                    c_cur = scn.chaos_c_start + t * (scn.chaos_c_end - scn.chaos_c_start)
-                    points = simulation.generate_points('ROSSLER', num_points, dt, sigma, rho, beta,
-                              a_cur, b_cur, c_cur,
-                              eqn_x, eqn_y, eqn_z,
-                              d_val, e_val, f_val,
-                              thomas_b,
-                              lang_a, lang_b, lang_c, lang_d, lang_e, lang_f,
-                              dad_a, dad_b, dad_c, dad_d, dad_e,
-                              fw_a, fw_b, fw_c,
-                              sp_a, sp_b,
-                              halv_a,
-                              l83_a, l83_b, l83_f, l83_g,
-                              x0=0.1, y0=0.11, z0=0.12)
-                elif attractor_type == 'THOMAS':
-                    thomas_b_cur = scn.chaos_thomas_b_start + t * (scn.chaos_thomas_b_end - scn.chaos_thomas_b_start)
-                    points = simulation.generate_points('THOMAS', num_points, dt, sigma, rho, beta,
-                              a_val, b_val, c_val,
-                              eqn_x, eqn_y, eqn_z,
-                              d_val, e_val, f_val,
-                              thomas_b_cur,
-                              lang_a, lang_b, lang_c, lang_d, lang_e, lang_f,
-                              dad_a, dad_b, dad_c, dad_d, dad_e,
-                              fw_a, fw_b, fw_c,
-                              sp_a, sp_b,
-                              halv_a,
-                              l83_a, l83_b, l83_f, l83_g,
-                              x0=0.1, y0=0.11, z0=0.12)
-                # ... Continue with other attractors similarly
-                for i, (xx, yy, zz) in enumerate(points):
-                    spline.points[i].co = (xx, yy, zz, 1.0)
-                    spline.points[i].keyframe_insert(data_path="co", frame=frame)
+            # Integrate the trajectories for every frame's parameters together: (frames, points, 3)
+            param_table = attractors.interpolated_param_table(scn, attractor_type, anim_frames)
+            sweep = simulation.generate_parameter_sweep(attractor_type, param_table, num_points, dt,
+                                                        x0=0.1, y0=0.11, z0=0.12, eqns=eqns,
+                                                        integrator=integrator, tolerance=tolerance,
+                                                        backend=backend)
+            # The curve is deformed per frame, so its rotation (about the first frame's
+            # centroid), scale and position always live on the object
+            curve_obj.matrix_world = simulation.blender_matrix(simulation.transform_matrix(
+                sweep[0], scn.chaos_rot_x, scn.chaos_rot_y, scn.chaos_rot_z, scale_factor, origin))
+            if scn.chaos_param_output == 'CACHE':
+                # One (frames, points, 3) float32 cache deforms the curve on frame change
+                # instead of frames * points keyframes stored in the .blend
+                data = {"cache_frame_start": 1}
+                if bpy.data.filepath:
+                    path = bake.cache_path(bpy.data.filepath, curve_obj.name)
+                    data["cache"] = bake.save_cache(path, sweep)
+                    curve_obj[bake.CACHE_PATH_PROP] = bpy.path.relpath(path)
+                    curve_obj[bake.CACHE_FRAME_START_PROP] = 1
+                else:
+                    # Kept in memory until the file is saved (see handlers.save_pending_caches)
+                    data["cache"] = sweep.astype(np.float32)
+                    data["pending_save"] = True
+                handlers.store_optimized_data(curve_obj.name, data)
+                handlers.write_curve_points(curve_data, data["cache"][0])
+            else:
+                for frame in range(1, anim_frames + 1):
+                    points = sweep[frame - 1].tolist()
+                    for i, (xx, yy, zz) in enumerate(points):
+                        spline.points[i].co = (xx, yy, zz, 1.0)
+                        spline.points[i].keyframe_insert(data_path="co", frame=frame)
             scn.frame_start = 1
             scn.frame_end = anim_frames
             scn.frame_set(1)
@@ -563,45 +621,28 @@ class CHAOS_OT_generate_animation(Operator):
             x_init = 0.1
             y_init = 0.11
             z_init = 0.12
-            points = simulation.generate_points(
-                attractor_type, num_frames, dt,
-                sigma, rho, beta,
-                a_val, b_val, c_val,
-                eqn_x, eqn_y, eqn_z,
-                d_val, e_val, f_val,
-                thomas_b,
-                lang_a, lang_b, lang_c,
-                lang_d, lang_e, lang_f,
-                dad_a, dad_b, dad_c, dad_d, dad_e,
-                fw_a, fw_b, fw_c,
-                sp_a, sp_b,
-                halv_a,
-                l83_a, l83_b, l83_f, l83_g,
-                x0=x_init, y0=y_init, z0=z_init
+            trajectory = simulation.generate_trajectory(
+                attractor_type, params, num_frames, dt,
+                x0=x_init, y0=y_init, z0=z_init, eqns=eqns,
+                integrator=integrator, tolerance=tolerance, backend=backend
             )
-            points = simulation.rotate_points(points, scn.chaos_rot_x, scn.chaos_rot_y, scn.chaos_rot_z)
-            if scn.chaos_scale != 1.0:
-                points = [(xx*scn.chaos_scale, yy*scn.chaos_scale, zz*scn.chaos_scale) for (xx, yy, zz) in points]
-            points = [(xx + origin[0], yy + origin[1], zz + origin[2]) for (xx, yy, zz) in points]
+            matrix = simulation.transform_matrix(trajectory, scn.chaos_rot_x, scn.chaos_rot_y,
+                                                 scn.chaos_rot_z, scale_factor, origin)
+            points = trajectory if bake_matrix else simulation.apply_matrix(trajectory, matrix)
             curve_data = bpy.data.curves.new(f"{attractor_type}_Curve_Static", type='CURVE')
             curve_data.dimensions = '3D'
             curve_data.bevel_depth = bevel_depth
             if scn.chaos_line_smooth:
-                spl = curve_data.splines.new('BEZIER')
-                spl.bezier_points.add(len(points) - 1)
-                for i, (xx, yy, zz) in enumerate(points):
-                    bp = spl.bezier_points[i]
-                    bp.co = (xx, yy, zz)
-                    bp.handle_left_type = 'AUTO'
-                    bp.handle_right_type = 'AUTO'
-                spl.resolution_u = scn.chaos_line_resolution
+                curves.add_bezier_spline(curve_data, points, scn.chaos_line_resolution)
             else:
-                spl = curve_data.splines.new('POLY')
-                spl.points.add(len(points) - 1)
-                for i, (xx, yy, zz) in enumerate(points):
-                    spl.points[i].co = (xx, yy, zz, 1.0)
+                curves.add_poly_spline(curve_data, points)
             curve_obj = bpy.data.objects.new(f"{attractor_type}_Line_Static", curve_data)
+            if bake_matrix:
+                curve_obj.matrix_world = simulation.blender_matrix(matrix)
             chaos_collection.objects.link(curve_obj)
+            if export_fields:
+                chaos_collection.objects.link(create_field_chain(
+                    f"{curve_obj.name}_Fields", points, dt, curve_obj))
             if scn.chaos_use_custom_material and scn.chaos_custom_material is not None:
                 local_mat_line = scn.chaos_custom_material
             elif use_color_range:
@@ -626,14 +667,10 @@ class CHAOS_OT_clear_scene(Operator):
     def execute(self, context):
         for obj in list(bpy.data.objects):
             nm = obj.name
-            if (nm.startswith("PARTICLE_") or nm.startswith("LORENZ_") or nm.startswith("ROSSLER_") or
-                nm.startswith("CUSTOM_") or nm.startswith("THOMAS_") or nm.startswith("LANGFORD_") or
-                nm.startswith("DADRAS_") or nm.startswith("FOURWING_") or nm.startswith("SPROTT_") or
-                nm.startswith("HALVORSEN_") or nm.startswith("LORENZ83_") or nm.startswith("ARNEODO_") or
-                nm.startswith("RUCKLIDGE_") or nm.startswith("Optimized_Particles")):
+            if nm.startswith(generated_object_prefixes()):
                 bpy.data.objects.remove(obj, do_unlink=True)
         for mat in list(bpy.data.materials):
-            if mat.name.startswith("ChaoticMat_Rand") or mat.name.startswith("ChaoticMat_Uniform"):
+            if mat.name.startswith(("ChaoticMat_Rand", "ChaoticMat_Uniform", "ChaoticMat_Attribute")):
                 bpy.data.materials.remove(mat, do_unlink=True)
         handlers.clear_optimized_data()
         self.report({'INFO'}, "Scene and related Chaotic materials have been cleared.")
@@ -646,7 +683,7 @@ class CHAOS_OT_save_last(Operator):
     bl_label = "Save Last"
 
     def execute(self, context):
-        obj_prefixes = ("PARTICLE_", "LORENZ_", "ROSSLER_", "CUSTOM_", "THOMAS_", "LANGFORD_", "DADRAS_", "FOURWING_", "SPROTT_", "HALVORSEN_", "LORENZ83_", "ARNEODO_", "RUCKLIDGE_", "Optimized_Particles")
+        obj_prefixes = generated_object_prefixes()
         saved_count = 0
         for obj in bpy.data.objects:
             for prefix in obj_prefixes:
@@ -654,7 +691,7 @@ class CHAOS_OT_save_last(Operator):
                     obj.name = "SAVED_" + obj.name
                     saved_count += 1
                     break
-        mat_prefixes = ("ChaoticMat_Rand", "ChaoticMat_Uniform")
+        mat_prefixes = ("ChaoticMat_Rand", "ChaoticMat_Uniform", "ChaoticMat_Attribute")
         for mat in bpy.data.materials:
             for prefix in mat_prefixes:
                 if mat.name.startswith(prefix) and not mat.name.startswith("SAVED_"):
@@ -664,6 +701,71 @@ class CHAOS_OT_save_last(Operator):
         return {'FINISHED'}
 
 
+class CHAOS_OT_clear_trajectory_cache(Operator):
+    """Drop all cached trajectories and reset the hit/miss counters."""
+    bl_idname = "chaos.clear_trajectory_cache"
+    bl_label = "Clear Trajectory Cache"
+
+    def execute(self, context):
+        simulation.trajectory_cache.clear()
+        self.report({'INFO'}, "Trajectory cache cleared.")
+        return {'FINISHED'}
+
+
+class CHAOS_OT_benchmark_vertex_write(Operator):
+    """Time each way of uploading optimized particle positions to the mesh."""
+    bl_idname = "chaos.benchmark_vertex_write"
+    bl_label = "Benchmark Vertex Write"
+
+    repeats: bpy.props.IntProperty(name="Repeats", default=5, min=1)
+
+    def execute(self, context):
+        active = context.active_object
+        obj_name, data = handlers.get_optimized_data(active.name if active else None)
+        obj = bpy.data.objects.get(obj_name) if obj_name else None
+        if obj is None or "positions" not in data:
+            self.report({'ERROR'}, "No optimized particle object to benchmark")
+            return {'CANCELLED'}
+        timings = handlers.time_vertex_writes(obj.data, data["positions"], self.repeats)
+        summary = ", ".join(f"{name}: {seconds * 1000:.2f} ms" for name, seconds in timings.items())
+        self.report({'INFO'}, f"Vertex write per frame - {summary}")
+        return {'FINISHED'}
+
+
+class CHAOS_OT_bake_optimized(Operator):
+    """Bake the optimized particle simulation to a position cache next to the .blend file."""
+    bl_idname = "chaos.bake_optimized"
+    bl_label = "Bake Optimized Particles"
+
+    def execute(self, context):
+        scn = context.scene
+        if not bpy.data.filepath:
+            self.report({'ERROR'}, "Save the .blend file before baking")
+            return {'CANCELLED'}
+        active = context.active_object
+        obj_name, data = handlers.get_optimized_data(active.name if active else None)
+        obj = bpy.data.objects.get(obj_name) if obj_name else None
+        if obj is None or "state" not in data:
+            self.report({'ERROR'}, "No optimized particle simulation to bake")
+            return {'CANCELLED'}
+        start_time = time.time()
+        path = bake.cache_path(bpy.data.filepath, obj.name)
+        # Release any previous bake of this object before its file is overwritten
+        data.pop("cache", None)
+        cache = bake.bake_positions(data, path, scn.frame_start, scn.frame_end)
+        # Playback reads the cache from now on (the on-demand state is kept for re-baking),
+        # and so does any session that reopens the file
+        data["cache"] = cache
+        data["cache_frame_start"] = scn.frame_start
+        obj[bake.CACHE_PATH_PROP] = bpy.path.relpath(path)
+        obj[bake.CACHE_FRAME_START_PROP] = scn.frame_start
+        obj[bake.CACHE_RELEASE_OFFSET_PROP] = data["release_offset"]
+        obj[bake.CACHE_FRAME_TIME_PROP] = handlers.frame_time(data)
+        scn.chaos_last_run_time = time.time() - start_time
+        self.report({'INFO'}, f"Baked {cache.shape[0]} frames of {cache.shape[1]} particles to {path} in {scn.chaos_last_run_time:.3f} seconds.")
+        return {'FINISHED'}
+
+
 class CHAOS_OT_reset_defaults(Operator):
     """Reset all parameters to initial default values."""
     bl_idname = "chaos.reset_defaults"
@@ -679,6 +781,23 @@ class CHAOS_OT_reset_defaults(Operator):
         scn.chaos_attractor_type = 'LORENZ'
         scn.chaos_num_frames = 250
         scn.chaos_dt = 0.01
+        scn.chaos_integrator = 'EULER'
+        scn.chaos_integrator_tolerance = 1e-6
+        scn.chaos_backend = 'AUTO'
+        scn.chaos_checkpoint_interval = 100
+        scn.chaos_checkpoint_budget = 256
+        scn.chaos_optimized_trails = False
+        scn.chaos_optimized_trail_length = 10
+        scn.chaos_color_source = 'RANDOM'
+        scn.chaos_export_fields = False
+        scn.chaos_cache_size = 64
+        scn.chaos_param_output = 'CACHE'
+        scn.chaos_reduce_keys = False
+        scn.chaos_preview_debounce = 0.0
+        scn.chaos_preview_background = True
+        scn.chaos_preview_points = 20000
+        scn.chaos_transform_mode = 'VERTICES'
+        scn.chaos_key_tolerance = 0.01
         scn.chaos_anim_speed = 1.0
         scn.chaos_num_particles = 5
         scn.chaos_offset_scale = 0.02
@@ -3,37 +3,17 @@ Scene property definitions and update functions
 """
 import bpy
 from bpy.types import Scene
+from . import attractors, simulation
 
 
 def update_attractor_type(self, context):
     """Update default timestep when attractor type changes"""
-    if self.chaos_attractor_type == 'LORENZ':
-        self.chaos_dt = 0.01
-    elif self.chaos_attractor_type == 'ROSSLER':
-        self.chaos_dt = 0.07
-    elif self.chaos_attractor_type == 'THOMAS':
-        self.chaos_dt = 0.21
-    elif self.chaos_attractor_type == 'LANGFORD':
-        self.chaos_dt = 0.01
-    elif self.chaos_attractor_type == 'DADRAS':
-        self.chaos_dt = 0.01
-    elif self.chaos_attractor_type == 'FOURWING':
-        self.chaos_dt = 0.088
-    elif self.chaos_attractor_type == 'SPROTT':
-        self.chaos_dt = 0.02
-    elif self.chaos_attractor_type == 'HALVORSEN':
-        self.chaos_dt = 0.01
-    elif self.chaos_attractor_type == 'LORENZ83':
-        self.chaos_dt = 0.01
-    elif self.chaos_attractor_type == 'ARNEODO':
-        self.chaos_dt = 0.025
-        self.chaos_a = 5.5
-        self.chaos_b = 3.5
-        self.chaos_c = 0.01
-    elif self.chaos_attractor_type == 'RUCKLIDGE':
-        self.chaos_dt = 0.07
-        self.chaos_a = 6.7
-        self.chaos_b = 2.0
+    attractors.apply_attractor_defaults(self)
+
+
+def update_cache_size(self, context):
+    """Apply a new trajectory cache budget right away"""
+    simulation.trajectory_cache.resize(self.chaos_cache_size * 2**20)
 
 
 def register_properties():
@@ -51,20 +31,7 @@ def register_properties():
 
     Scene.chaos_attractor_type = bpy.props.EnumProperty(
         name="Attractor",
-        items=[
-            ('LORENZ', "Lorenz", ""),
-            ('ROSSLER', "Rössler", ""),
-            ('THOMAS', "Thomas", ""),
-            ('LANGFORD', "Langford (Aizawa)", ""),
-            ('DADRAS', "Dadras", ""),
-            ('FOURWING', "Four-Wing", ""),
-            ('SPROTT', "Sprott", ""),
-            ('HALVORSEN', "Halvorsen", ""),
-            ('LORENZ83', "Lorenz83", ""),
-            ('CUSTOM', "Custom", ""),
-            ('ARNEODO', "Arneodo", "Arneodo Attractor"),
-            ('RUCKLIDGE', "Rucklidge", "Rucklidge Attractor"),
-        ],
+        items=attractors.enum_items(),
         default='LORENZ',
         update=update_attractor_type
     )
@@ -72,6 +39,27 @@ def register_properties():
     # Simulation parameters
     Scene.chaos_num_frames = bpy.props.IntProperty(name="Frames", default=100, min=1, description="Number of iterations/frames.\nWARNING: High iterations increase simulation time.")
     Scene.chaos_dt = bpy.props.FloatProperty(name="dt", default=0.01, min=1e-6, description="Determines the time interval between sampling points.")
+    Scene.chaos_integrator = bpy.props.EnumProperty(
+        name="Integrator",
+        items=[
+            ('EULER', "Euler", "Forward Euler, one derivative evaluation per step"),
+            ('RK4', "RK4", "Classical 4th order Runge-Kutta, accurate at much larger dt"),
+            ('RK45', "RK45 (Adaptive)", "Adaptive Dormand-Prince with dense output sampled every dt")
+        ],
+        default='EULER',
+        description="Numerical integration scheme used for every generation mode"
+    )
+    Scene.chaos_integrator_tolerance = bpy.props.FloatProperty(name="Tolerance", default=1e-6, min=1e-12, max=1e-1, precision=8, description="Local error tolerance of the adaptive RK45 integrator")
+    Scene.chaos_backend = bpy.props.EnumProperty(
+        name="Backend",
+        items=[
+            ('AUTO', "Auto", "Use the JIT backend when Numba is installed, otherwise NumPy"),
+            ('NUMPY', "NumPy", "Always use the vectorized NumPy backend"),
+            ('JIT', "JIT (Numba)", "Compile derivatives and Euler/RK4 integration loops with Numba")
+        ],
+        default='AUTO',
+        description="Compute backend for trajectory integration"
+    )
     Scene.chaos_anim_speed = bpy.props.FloatProperty(name="Animation Speed", default=1.0, min=0.01, description="Determines spacing between keyframes")
     Scene.chaos_num_particles = bpy.props.IntProperty(name="Particles", default=5, min=1, description="Determines the number of particles.\nWARNING:")
     Scene.chaos_offset_scale = bpy.props.FloatProperty(name="Offset", default=0.02, min=0.0)
@@ -155,6 +143,16 @@ def register_properties():
     Scene.chaos_use_color_range = bpy.props.BoolProperty(name="Use Color Range", default=False)
     Scene.chaos_color_min = bpy.props.FloatVectorProperty(name="Min Color", subtype='COLOR', size=3, default=(0.0, 0.5, 1.0))
     Scene.chaos_color_max = bpy.props.FloatVectorProperty(name="Max Color", subtype='COLOR', size=3, default=(0.0, 1, 1))
+    Scene.chaos_color_source = bpy.props.EnumProperty(
+        name="Color By",
+        description="What places each optimized particle within the color range",
+        items=[
+            ('RANDOM', "Random", "A fixed random color per particle"),
+            ('SPEED', "Speed", "Faster particles get colors closer to the max color"),
+            ('DISTANCE', "Distance", "Particles further from the centre of the cloud get colors closer to the max color"),
+        ],
+        default='RANDOM'
+    )
     Scene.chaos_use_custom_material = bpy.props.BoolProperty(name="Use Custom Material", default=False)
     Scene.chaos_custom_material = bpy.props.PointerProperty(name="Custom Material", type=bpy.types.Material, description="Material to apply to all attractor objects")
     
@@ -166,9 +164,21 @@ def register_properties():
     Scene.chaos_rot_y = bpy.props.FloatProperty(name="Rotation Y", default=0.0, subtype='ANGLE')
     Scene.chaos_rot_z = bpy.props.FloatProperty(name="Rotation Z", default=0.0, subtype='ANGLE')
     Scene.chaos_live_preview = bpy.props.BoolProperty(name="Live Preview", default=False)
+    Scene.chaos_preview_debounce = bpy.props.FloatProperty(name="Preview Debounce", default=0.0, min=0.0, max=5.0, subtype='TIME', unit='TIME', description="Wait this many seconds after the last change before rebuilding the live preview (0 rebuilds immediately)")
+    Scene.chaos_preview_background = bpy.props.BoolProperty(name="Background Preview", default=True, description="Integrate the live preview in a background thread so the interface stays responsive; a newer change cancels the running job")
+    Scene.chaos_preview_points = bpy.props.IntProperty(name="Preview Points", default=20000, min=0, description="Iterations shown by the first live preview pass after an edit; later passes refine it up to the full Frames count while the inputs stay unchanged (0 computes the full trajectory at once)")
+    Scene.chaos_cache_size = bpy.props.IntProperty(name="Trajectory Cache", default=64, min=0, subtype='UNSIGNED', update=update_cache_size, description="Memory in MB for caching integrated trajectories reused by the live preview and Static Line")
     Scene.chaos_taper_trail = bpy.props.BoolProperty(name="Taper Trail", default=False, description="Limit the trail length following the particle")
     Scene.chaos_trail_length = bpy.props.FloatProperty(name="Trail Length", default=0.2, min=0.0, max=1.0, description="Fraction of the attractor points used for the trail")
     Scene.chaos_animation_frames = bpy.props.IntProperty(name="Animation Frames", default=100, min=1)
+    Scene.chaos_param_output = bpy.props.EnumProperty(
+        name="Output",
+        items=[
+            ('CACHE', "Point Cache", "Store every frame's curve compactly next to the .blend and deform the curve on frame change"),
+            ('KEYFRAMES', "Keyframes", "Keyframe every curve point on every frame (slow to build, large files)")
+        ],
+        default='CACHE'
+    )
     
     # Parameter animation start/end values
     Scene.chaos_sigma_start = bpy.props.FloatProperty(name="sigma Start", default=10.0)
@@ -233,12 +243,49 @@ def register_properties():
     Scene.chaos_l83_f_end = bpy.props.FloatProperty(name="f End", default=4.83)
     Scene.chaos_l83_g_start = bpy.props.FloatProperty(name="g Start", default=4.66)
     Scene.chaos_l83_g_end = bpy.props.FloatProperty(name="g End", default=4.66)
+    Scene.chaos_arn_a_start = bpy.props.FloatProperty(name="a Start", default=5.5)
+    Scene.chaos_arn_a_end = bpy.props.FloatProperty(name="a End", default=5.5)
+    Scene.chaos_arn_b_start = bpy.props.FloatProperty(name="b Start", default=3.5)
+    Scene.chaos_arn_b_end = bpy.props.FloatProperty(name="b End", default=3.5)
+    Scene.chaos_arn_c_start = bpy.props.FloatProperty(name="c Start", default=0.01)
+    Scene.chaos_arn_c_end = bpy.props.FloatProperty(name="c End", default=0.01)
+    Scene.chaos_ruck_a_start = bpy.props.FloatProperty(name="a Start", default=6.7)
+    Scene.chaos_ruck_a_end = bpy.props.FloatProperty(name="a End", default=6.7)
+    Scene.chaos_ruck_b_start = bpy.props.FloatProperty(name="b Start", default=2.0)
+    Scene.chaos_ruck_b_end = bpy.props.FloatProperty(name="b End", default=2.0)
+    Scene.chaos_cust_a_start = bpy.props.FloatProperty(name="a Start", default=0.2)
+    Scene.chaos_cust_a_end = bpy.props.FloatProperty(name="a End", default=0.2)
+    Scene.chaos_cust_b_start = bpy.props.FloatProperty(name="b Start", default=0.2)
+    Scene.chaos_cust_b_end = bpy.props.FloatProperty(name="b End", default=0.2)
+    Scene.chaos_cust_c_start = bpy.props.FloatProperty(name="c Start", default=5.7)
+    Scene.chaos_cust_c_end = bpy.props.FloatProperty(name="c End", default=5.7)
+    Scene.chaos_cust_d_start = bpy.props.FloatProperty(name="d Start", default=0.0)
+    Scene.chaos_cust_d_end = bpy.props.FloatProperty(name="d End", default=0.0)
+    Scene.chaos_cust_e_start = bpy.props.FloatProperty(name="e Start", default=0.0)
+    Scene.chaos_cust_e_end = bpy.props.FloatProperty(name="e End", default=0.0)
+    Scene.chaos_cust_f_start = bpy.props.FloatProperty(name="f Start", default=0.0)
+    Scene.chaos_cust_f_end = bpy.props.FloatProperty(name="f End", default=0.0)
     
     # Animation settings
     Scene.chaos_follow_curve = bpy.props.BoolProperty(name="Follow Curve", default=False, description="Make particles follow the heading of the curve")
     Scene.chaos_stagger_release = bpy.props.BoolProperty(name="Stagger Release", default=False, description="Stagger particle release times")
     Scene.chaos_release_offset = bpy.props.IntProperty(name="Release Offset", default=0, min=0, description="Delay in frames between particle releases")
     Scene.chaos_optimized_mode = bpy.props.BoolProperty(name="Optimized Mode", default=False, description="Use optimized instancing for high particle counts (supported for selected attractors in Particle Animation mode)")
+    Scene.chaos_optimized_trails = bpy.props.BoolProperty(name="Trails", default=False, description="Draw a short trail behind every optimized particle from a ring buffer of its recent positions")
+    Scene.chaos_export_fields = bpy.props.BoolProperty(name="Speed/Curvature Fields", default=False, description="Store the local speed and curvature of the flow: chaos_speed and chaos_curvature point attributes on optimized particle and trail meshes, and on an unrendered edge chain mesh parented to each Static Line or trail curve")
+    Scene.chaos_optimized_trail_length = bpy.props.IntProperty(name="Trail Frames", default=10, min=2, max=256, description="Number of recent frames each optimized particle trail spans")
+    Scene.chaos_transform_mode = bpy.props.EnumProperty(
+        name="Transform",
+        items=[
+            ('VERTICES', "Points", "Apply rotation, scale and position to the generated points"),
+            ('OBJECT', "Object Matrix", "Keep the simulated coordinates and put rotation, scale and position on the curve object")
+        ],
+        default='VERTICES'
+    )
+    Scene.chaos_reduce_keys = bpy.props.BoolProperty(name="Reduce Keyframes", default=False, description="Drop keyframes that linear interpolation reproduces within the key tolerance")
+    Scene.chaos_key_tolerance = bpy.props.FloatProperty(name="Key Tolerance", default=0.01, min=0.0, precision=4, description="Largest distance a reduced animation may deviate from the simulated trajectory")
+    Scene.chaos_checkpoint_interval = bpy.props.IntProperty(name="Checkpoint Interval", default=100, min=1, description="Iterations between stored optimized mode states used to seek when scrubbing the timeline")
+    Scene.chaos_checkpoint_budget = bpy.props.IntProperty(name="Checkpoint Budget", default=256, min=0, subtype='UNSIGNED', description="Memory in MB for optimized mode checkpoints; the interval widens automatically to stay within it")
 
 
 def unregister_properties():
@@ -248,6 +295,9 @@ def unregister_properties():
     del Scene.chaos_attractor_type
     del Scene.chaos_num_frames
     del Scene.chaos_dt
+    del Scene.chaos_integrator
+    del Scene.chaos_integrator_tolerance
+    del Scene.chaos_backend
     del Scene.chaos_anim_speed
     del Scene.chaos_num_particles
     del Scene.chaos_offset_scale
@@ -310,6 +360,8 @@ def unregister_properties():
     del Scene.chaos_use_color_range
     del Scene.chaos_color_min
     del Scene.chaos_color_max
+    del Scene.chaos_color_source
+    del Scene.chaos_export_fields
     del Scene.chaos_use_custom_material
     del Scene.chaos_custom_material
     
@@ -320,9 +372,14 @@ def unregister_properties():
     del Scene.chaos_rot_y
     del Scene.chaos_rot_z
     del Scene.chaos_live_preview
+    del Scene.chaos_cache_size
+    del Scene.chaos_preview_debounce
+    del Scene.chaos_preview_background
+    del Scene.chaos_preview_points
     del Scene.chaos_taper_trail
     del Scene.chaos_trail_length
     del Scene.chaos_animation_frames
+    del Scene.chaos_param_output
     
     # Parameter animation properties
     del Scene.chaos_sigma_start
@@ -387,9 +444,38 @@ def unregister_properties():
     del Scene.chaos_l83_f_end
     del Scene.chaos_l83_g_start
     del Scene.chaos_l83_g_end
+    del Scene.chaos_arn_a_start
+    del Scene.chaos_arn_a_end
+    del Scene.chaos_arn_b_start
+    del Scene.chaos_arn_b_end
+    del Scene.chaos_arn_c_start
+    del Scene.chaos_arn_c_end
+    del Scene.chaos_ruck_a_start
+    del Scene.chaos_ruck_a_end
+    del Scene.chaos_ruck_b_start
+    del Scene.chaos_ruck_b_end
+    del Scene.chaos_cust_a_start
+    del Scene.chaos_cust_a_end
+    del Scene.chaos_cust_b_start
+    del Scene.chaos_cust_b_end
+    del Scene.chaos_cust_c_start
+    del Scene.chaos_cust_c_end
+    del Scene.chaos_cust_d_start
+    del Scene.chaos_cust_d_end
+    del Scene.chaos_cust_e_start
+    del Scene.chaos_cust_e_end
+    del Scene.chaos_cust_f_start
+    del Scene.chaos_cust_f_end
     
     # Animation properties
     del Scene.chaos_follow_curve
     del Scene.chaos_stagger_release
     del Scene.chaos_release_offset
-    del Scene.chaos_optimized_mode 
\ No newline at end of file
+    del Scene.chaos_optimized_mode
+    del Scene.chaos_optimized_trails
+    del Scene.chaos_optimized_trail_length
+    del Scene.chaos_transform_mode
+    del Scene.chaos_reduce_keys
+    del Scene.chaos_key_tolerance
+    del Scene.chaos_checkpoint_interval
+    del Scene.chaos_checkpoint_budget 
\ No newline at end of file
@@ -1,83 +1,187 @@
 """
 Simulation and point generation utilities
 """
-import random
 import mathutils
 import numpy as np
-from . import attractors
-
-
-def rotate_points(points, rx, ry, rz):
-    """Rotate a list of points around their centroid"""
-    if rx == 0 and ry == 0 and rz == 0:
-        return points
-    cx = sum(p[0] for p in points) / len(points)
-    cy = sum(p[1] for p in points) / len(points)
-    cz = sum(p[2] for p in points) / len(points)
-    centroid = mathutils.Vector((cx, cy, cz))
-    euler = mathutils.Euler((rx, ry, rz), 'XYZ')
-    rotated = []
-    for p in points:
-        vec = mathutils.Vector(p)
-        vec -= centroid
-        vec = euler.to_matrix() @ vec
-        vec += centroid
-        rotated.append((vec.x, vec.y, vec.z))
-    return rotated
-
-
-def generate_points(attractor_type, iterations, dt,
-                    sigma, rho, beta, 
-                    a_val, b_val, c_val, 
-                    eqn_x, eqn_y, eqn_z,
-                    d_val, e_val, f_val,
-                    thomas_b,
-                    lang_a, lang_b, lang_c, lang_d, lang_e, lang_f,
-                    dad_a, dad_b, dad_c, dad_d, dad_e,
-                    fw_a, fw_b, fw_c,
-                    sp_a, sp_b,
-                    halv_a,
-                    l83_a, l83_b, l83_f, l83_g,
-                    x0=0.1, y0=0.1, z0=0.1):
-    """Generate points for a chaotic attractor"""
-    x, y, z = x0, y0, z0
+from . import attractors, backends
+from .trajectory_cache import TrajectoryCache
+
+
+# Shared by the live preview and LINE_STATIC (PARAMETER_ANIMATION sweeps bypass it)
+trajectory_cache = TrajectoryCache()
+
+
+def transform_matrix(points, rx, ry, rz, scale=1.0, origin=(0.0, 0.0, 0.0)):
+    """4x4 matrix rotating points about their centroid, then scaling and offsetting them
+
+    Equivalent to rotating around the centroid of the (finite) points with an XYZ Euler
+    rotation, multiplying by scale and adding origin, as a single affine transform.
+    """
+    matrix = np.identity(4)
+    rotation = attractors.euler_xyz_matrix(rx, ry, rz)
+    matrix[:3, :3] = rotation * scale
+    if rx or ry or rz:
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+        finite = points[np.isfinite(points).all(axis=1)]
+        centroid = finite.mean(axis=0) if len(finite) else np.zeros(3)
+        matrix[:3, 3] = (centroid - rotation @ centroid) * scale
+    matrix[:3, 3] += origin
+    return matrix
+
+
+def apply_matrix(points, matrix):
+    """Apply a 4x4 affine matrix to an (..., 3) array of points, returning a new array"""
+    points = np.asarray(points, dtype=np.float64)
+    return points @ matrix[:3, :3].T + matrix[:3, 3]
+
+
+def transform_points(points, rx, ry, rz, scale=1.0, origin=(0.0, 0.0, 0.0)):
+    """Rotate about the centroid, scale and offset an (n, 3) trajectory in one pass"""
+    return apply_matrix(points, transform_matrix(points, rx, ry, rz, scale, origin))
+
+
+def blender_matrix(matrix):
+    """Convert a 4x4 NumPy matrix for assignment to Object.matrix_world"""
+    return mathutils.Matrix(matrix.tolist())
+
+
+def trajectory_fields(points, dt):
+    """Speed and curvature along (..., T, 3) trajectories sampled every dt
+
+    Central differences of the integrated positions give velocity and acceleration, so
+    no derivative is evaluated again. Curvature is |v x a| / |v|^3 (0 where the motion
+    stalls). Returns two (..., T) float32 arrays in the units of the points.
+    """
+    points = np.asarray(points, dtype=np.float64)
+    if points.shape[-2] < 2:
+        zeros = np.zeros(points.shape[:-1], dtype=np.float32)
+        return zeros, zeros.copy()
+    velocity = np.gradient(points, dt, axis=-2)
+    acceleration = np.gradient(velocity, dt, axis=-2)
+    speed = np.linalg.norm(velocity, axis=-1)
+    curvature = np.linalg.norm(np.cross(velocity, acceleration), axis=-1)
+    np.divide(curvature, speed ** 3, out=curvature, where=speed > 0)
+    return speed.astype(np.float32), curvature.astype(np.float32)
+
+
+def trajectory_key(attractor_type, params, dt, initial_state, eqns, integrator, tolerance, backend):
+    """Return the cache key of everything that determines a trajectory except its length"""
+    return (attractor_type, tuple(float(p) for p in params),
+            tuple(eqns) if attractor_type == 'CUSTOM' else None,
+            float(dt), tuple(float(v) for v in initial_state), integrator,
+            float(tolerance) if integrator == 'RK45' else None,
+            backends.resolve_backend(backend, integrator))
+
+
+def _integrate_single(attractor_type, params, iterations, dt, start, eqns,
+                      integrator, tolerance, backend):
+    """Integrate one trajectory of the given length from start, uncached"""
+    if integrator != 'EULER' or backends.resolve_backend(backend, integrator) == 'JIT':
+        # Higher-order schemes and compiled kernels run through the batched engine
+        return generate_points_batch(attractor_type, params, iterations, dt, [start], eqns=eqns,
+                                     integrator=integrator, tolerance=tolerance,
+                                     backend=backend)[0]
+    # Resolve the derivative once, then step in plain Python floats
+    func, params = attractors.resolve_kernel(attractor_type, params, eqns)
+    x, y, z = (float(v) for v in start)
     points = [None] * iterations
-    
-    # Select the appropriate step function
-    if attractor_type == 'LORENZ':
-        step = lambda x, y, z: attractors.step_lorenz(x, y, z, dt, sigma, rho, beta)
-    elif attractor_type == 'ROSSLER':
-        step = lambda x, y, z: attractors.step_rossler(x, y, z, dt, a_val, b_val, c_val)
-    elif attractor_type == 'THOMAS':
-        step = lambda x, y, z: attractors.step_thomas(x, y, z, dt, thomas_b)
-    elif attractor_type == 'LANGFORD':
-        step = lambda x, y, z: attractors.step_langford(x, y, z, dt, lang_a, lang_b, lang_c, lang_d, lang_e, lang_f)
-    elif attractor_type == 'DADRAS':
-        step = lambda x, y, z: attractors.step_dadras(x, y, z, dt, dad_a, dad_b, dad_c, dad_d, dad_e)
-    elif attractor_type == 'CUSTOM':
-        step = lambda x, y, z: attractors.step_custom(x, y, z, dt, eqn_x, eqn_y, eqn_z, a_val, b_val, c_val, d_val, e_val, f_val)
-    elif attractor_type == 'FOURWING':
-        step = lambda x, y, z: attractors.step_fourwing(x, y, z, dt, fw_a, fw_b, fw_c)
-    elif attractor_type == 'SPROTT':
-        step = lambda x, y, z: attractors.step_sprott(x, y, z, dt, sp_a, sp_b)
-    elif attractor_type == 'HALVORSEN':
-        step = lambda x, y, z: attractors.step_halvorsen(x, y, z, dt, halv_a)
-    elif attractor_type == 'LORENZ83':
-        step = lambda x, y, z: attractors.step_lorenz83(x, y, z, dt, l83_a, l83_b, l83_f, l83_g)
-    elif attractor_type == 'ARNEODO':
-        step = lambda x, y, z: attractors.step_arneodo(x, y, z, dt, a_val, b_val, c_val)
-    elif attractor_type == 'RUCKLIDGE':
-        step = lambda x, y, z: attractors.step_rucklidge(x, y, z, dt, a_val, b_val)
-    else:
-        return []
-    
-    # Generate points
     for i in range(iterations):
         points[i] = (x, y, z)
         try:
-            x, y, z = step(x, y, z)
+            dx, dy, dz = func(x, y, z, *params)
+            x, y, z = x + dx*dt, y + dy*dt, z + dz*dt
         except OverflowError:
             continue
-    return points
+    return np.array(points, dtype=np.float64).reshape(-1, 3)
+
+
+def generate_trajectory(attractor_type, params, iterations, dt,
+                        x0=0.1, y0=0.1, z0=0.1, eqns=None,
+                        integrator='EULER', tolerance=1e-6, backend='AUTO',
+                        chunk=None, cancel=None):
+    """Return a single trajectory as a read-only (iterations, 3) float64 array
+
+    Results are memoized in trajectory_cache under a key that leaves out the length:
+    a shorter request is a slice of the cached trajectory, and a longer one only
+    integrates the missing tail from the last cached point.
+
+    With a chunk size the tail is integrated chunk iterations at a time, each chunk
+    continuing from the last point, and a set cancel event stops the work between
+    chunks: None is returned and the part integrated so far is cached for the next call.
+    """
+    if iterations < 1:
+        return np.empty((0, 3))
+    key = trajectory_key(attractor_type, params, dt, (x0, y0, z0), eqns,
+                         integrator, tolerance, backend)
+    cached = trajectory_cache.get(key, iterations)
+    if cached is not None and len(cached) >= iterations:
+        return cached[:iterations]
+    known = len(cached) if cached is not None else 0
+    trajectory = np.empty((iterations, 3))
+    if known:
+        trajectory[:known] = cached
+        done = known
+    else:
+        trajectory[0] = (x0, y0, z0)
+        done = 1
+    step = chunk or iterations
+    while done < iterations:
+        if cancel is not None and cancel.is_set():
+            if done > known:
+                trajectory_cache.put(key, trajectory[:done].copy())
+            return None
+        stop = min(iterations, done + step)
+        # Fixed-step schemes continue exactly; RK45 restarts its step size control here
+        trajectory[done - 1:stop] = _integrate_single(attractor_type, params, stop - done + 1, dt,
+                                                      trajectory[done - 1], eqns, integrator,
+                                                      tolerance, backend)
+        done = stop
+    trajectory_cache.put(key, trajectory)
+    return trajectory
+
+
+def generate_points_batch(attractor_type, params, iterations, dt, initial_states, eqns=None,
+                          integrator='EULER', tolerance=1e-6, backend='AUTO'):
+    """Generate trajectories for a whole ensemble of particles at once
+
+    initial_states is an (N, 3) array of starting points. Every integration step
+    advances all N particles together, and the result is returned as a single
+    contiguous (N, iterations, 3) float64 array sampled every dt. integrator is one
+    of integrators.INTEGRATORS; tolerance only applies to the adaptive RK45 scheme.
+    backend is one of backends.BACKENDS.
+    """
+    states = np.asarray(initial_states, dtype=np.float64).reshape(-1, 3)
+    trajectories = np.empty((states.shape[0], iterations, 3), dtype=np.float64)
+    func, params = attractors.resolve_kernel(attractor_type, params, eqns)
+    # Diverging particles become inf/nan instead of raising OverflowError.
+    with np.errstate(over='ignore', invalid='ignore'):
+        backends.integrate(func, params, states, dt, iterations, trajectories,
+                           method=integrator, backend=backend,
+                           rtol=tolerance, atol=tolerance)
+    return trajectories
+
 
+def generate_parameter_sweep(attractor_type, param_table, iterations, dt,
+                             x0=0.1, y0=0.1, z0=0.1, eqns=None,
+                             integrator='EULER', tolerance=1e-6, backend='AUTO'):
+    """Integrate one trajectory per parameter record, all at once
 
+    param_table is an (F, num_params) array (see attractors.interpolated_param_table);
+    the parameter index is treated as another batch axis, so all F trajectories from
+    (x0, y0, z0) advance together. Returns an (F, iterations, 3) float64 array; when
+    every record is the same it is a read-only view of one trajectory integrated once.
+    """
+    param_table = np.asarray(param_table, dtype=np.float64)
+    frames = param_table.shape[0]
+    if frames > 1 and (param_table == param_table[0]).all():
+        single = generate_parameter_sweep(attractor_type, param_table[:1], iterations, dt,
+                                          x0, y0, z0, eqns, integrator, tolerance, backend)
+        return np.broadcast_to(single, (frames,) + single.shape[1:])
+    states = np.tile((x0, y0, z0), (frames, 1))
+    trajectories = np.empty((frames, iterations, 3), dtype=np.float64)
+    func, _ = attractors.resolve_kernel(attractor_type, (), eqns)
+    with np.errstate(over='ignore', invalid='ignore'):
+        backends.integrate_sweep(func, param_table, states, dt, iterations, trajectories,
+                                 method=integrator, backend=backend,
+                                 rtol=tolerance, atol=tolerance)
+    return trajectories
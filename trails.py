@@ -0,0 +1,49 @@
+"""
+Fixed-length trails of recent positions for optimized particle simulations
+"""
+import numpy as np
+
+
+class TrailRing:
+    """Positions of N particles over the last `length` frames in an (N, length, 3) ring buffer
+
+    Each frame overwrites the oldest slot, so a trail update costs one (N, 3) write
+    instead of shifting the whole history. ordered() unrolls the ring oldest-first for
+    the trail mesh, whose vertices are laid out particle by particle.
+    """
+
+    def __init__(self, num_particles, length):
+        self.length = max(2, int(length))
+        self.buffer = np.zeros((num_particles, self.length, 3), dtype=np.float32)
+        self._ordered = np.empty_like(self.buffer)
+        self.head = 0
+        self.frame = None
+
+    def clear(self):
+        """Forget the history, e.g. after the timeline jumped"""
+        self.head = 0
+        self.frame = None
+
+    def push(self, frame, positions):
+        """Record the (N, 3) positions of a frame as the newest sample"""
+        if self.frame is None:
+            # A fresh trail starts collapsed onto the first sample
+            self.buffer[:] = positions[:, None, :]
+        else:
+            self.buffer[:, self.head] = positions
+        self.head = (self.head + 1) % self.length
+        self.frame = frame
+
+    def ordered(self):
+        """Return the (N * length, 3) samples, oldest first within each particle"""
+        tail = self.length - self.head
+        self._ordered[:, :tail] = self.buffer[:, self.head:]
+        self._ordered[:, tail:] = self.buffer[:, :self.head]
+        return self._ordered.reshape(-1, 3)
+
+
+def trail_edges(num_particles, length):
+    """Edge vertex pairs chaining each particle's `length` trail vertices, as (E, 2) int32"""
+    start = (np.arange(num_particles, dtype=np.int32)[:, None] * length
+             + np.arange(length - 1, dtype=np.int32))
+    return np.stack((start, start + 1), axis=-1).reshape(-1, 2)
@@ -0,0 +1,84 @@
+"""
+Memory-capped LRU cache of integrated trajectories
+"""
+import threading
+from collections import OrderedDict
+
+
+class TrajectoryCache:
+    """Least-recently-used store of (T, 3) trajectory arrays with a byte budget
+
+    Keys describe everything that determines a trajectory apart from its length (see
+    simulation.trajectory_key), so settings that only affect materials, bevel or
+    placement never miss, and requests of a different length reuse the stored prefix.
+    Stored arrays are made read-only because every hit hands out the same array.
+    All methods take a lock, since the live preview worker shares the cache with the
+    main thread.
+    """
+
+    def __init__(self, max_bytes=64 * 2**20):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.partial_hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._nbytes = 0
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def nbytes(self):
+        return self._nbytes
+
+    def get(self, key, length):
+        """Return the cached trajectory for key, or None, updating the counters
+
+        A stored trajectory shorter than length is still returned (and counted as a
+        partial hit) so the caller can extend it.
+        """
+        with self._lock:
+            trajectory = self._entries.get(key)
+            if trajectory is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            if len(trajectory) >= length:
+                self.hits += 1
+            else:
+                self.partial_hits += 1
+            return trajectory
+
+    def put(self, key, trajectory):
+        """Store a trajectory, evicting the least recently used ones beyond the budget"""
+        if trajectory.nbytes > self.max_bytes:
+            return
+        trajectory.setflags(write=False)
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._nbytes -= previous.nbytes
+            self._entries[key] = trajectory
+            self._nbytes += trajectory.nbytes
+            self._evict()
+
+    def resize(self, max_bytes):
+        """Change the budget, evicting immediately if it shrank"""
+        with self._lock:
+            self.max_bytes = max_bytes
+            self._evict()
+
+    def clear(self):
+        """Drop every entry and reset the counters"""
+        with self._lock:
+            self._entries.clear()
+            self._nbytes = 0
+            self.hits = 0
+            self.partial_hits = 0
+            self.misses = 0
+
+    def _evict(self):
+        while self._nbytes > self.max_bytes and self._entries:
+            _, trajectory = self._entries.popitem(last=False)
+            self._nbytes -= trajectory.nbytes